@@ -6,9 +6,12 @@ Handles authentication, rate limiting, and token management
 
 import os
 import time
+import functools
+import random
 import json
 import subprocess
-import urllib.request
+import http.client
+import urllib.error
 import urllib.parse
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
@@ -31,29 +34,129 @@ class RateLimit:
     def time_until_reset(self) -> int:
         return max(0, self.reset_timestamp - int(time.time()))
 
+def _read_gh_hosts_token() -> Optional[str]:
+    """Read the github.com oauth_token from the GitHub CLI hosts.yml, if stored there"""
+    config_dir = os.getenv("GH_CONFIG_DIR") or os.path.join(
+        os.getenv("XDG_CONFIG_HOME") or os.path.expanduser("~/.config"), "gh")
+    try:
+        with open(os.path.join(config_dir, "hosts.yml")) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    
+    # hosts.yml is a flat mapping of host -> settings; only the direct
+    # oauth_token key under github.com matters, so no YAML parser is needed
+    in_github = False
+    child_indent = None
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        indent = len(line) - len(line.lstrip())
+        if indent == 0:
+            in_github = stripped == "github.com:"
+            child_indent = None
+        elif in_github:
+            child_indent = child_indent or indent
+            if indent == child_indent and stripped.startswith("oauth_token:"):
+                token = stripped.split(":", 1)[1].strip().strip("'\"")
+                return token or None
+    return None
+
+@functools.lru_cache(maxsize=1)
+def _gh_cli_token() -> Optional[str]:
+    """GitHub CLI token, read from its config file before falling back to `gh auth token`"""
+    token = _read_gh_hosts_token()
+    if token:
+        return token
+    
+    # Newer gh versions keep the token in the system keyring instead
+    try:
+        result = subprocess.run(
+            ["gh", "auth", "token"], 
+            capture_output=True, 
+            text=True,
+            timeout=5
+        )
+        if result.returncode == 0:
+            return result.stdout.strip()
+    except:
+        pass
+    return None
+
+# Retry policy for rate-limited (429/403) and 5xx GitHub API responses
+MAX_RETRY_ATTEMPTS = 5
+MAX_RETRY_DELAY = 120  # seconds; give up rather than wait longer than this
+RETRY_JITTER = 0.5  # seconds of random spread so concurrent workers don't retry in lockstep
+
+class TokenBucket:
+    """Thread-safe token bucket used to pace API requests across workers"""
+    
+    def __init__(self, capacity: float, refill_per_sec: float, tokens: Optional[float] = None):
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.tokens = capacity if tokens is None else min(capacity, tokens)
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_per_sec)
+        self.last_refill = now
+    
+    def acquire(self, n: int = 1) -> float:
+        """Take n tokens if available; otherwise return the seconds to wait before retrying"""
+        with self._lock:
+            self._refill()
+            if self.tokens >= n:
+                self.tokens -= n
+                return 0.0
+            if self.refill_per_sec <= 0:
+                return float("inf")
+            return (n - self.tokens) / self.refill_per_sec
+    
+    def clamp(self, max_tokens: float):
+        """Never hold more tokens than max_tokens, e.g. the quota the server reports left"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, max_tokens)
+    
+    def penalize(self):
+        """Drain the bucket after a 429 so callers back off for at least a second"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, -self.refill_per_sec)
+
 class GitHubAPILimitHandler:
     """Handles GitHub API rate limits and authentication"""
     
+    # Seconds a fetched rate limit snapshot is reused before re-querying
+    RATE_LIMIT_CACHE_TTL = 10
+    
     def __init__(self, token: Optional[str] = None):
         self.token = token or self._get_token()
         self.rate_limit_lock = threading.Lock()
         self.last_rate_limit: Optional[RateLimit] = None
         self.request_count = 0
+        self._cache_expiry = 0.0
+        self._last_etag: Optional[str] = None
+        self._bucket: Optional[TokenBucket] = None
+        self._connections = threading.local()
         
     def _get_token(self) -> Optional[str]:
         """Get GitHub token from various sources"""
-        # Priority order: explicit env var > gh CLI > GitHub Actions
-        token_sources = [
-            ("GITHUB_TOKEN", os.getenv("GITHUB_TOKEN")),
-            ("GH_TOKEN", os.getenv("GH_TOKEN")),
-            ("gh CLI", self._get_gh_token()),
-            ("Actions Token", os.getenv("GITHUB_TOKEN"))  # In GitHub Actions
-        ]
-        
-        for source, token in token_sources:
+        # Priority order: explicit env var (also set inside GitHub Actions) > gh CLI.
+        # Environment variables are checked first so gh is only consulted when needed.
+        for source in ("GITHUB_TOKEN", "GH_TOKEN"):
+            token = os.getenv(source)
             if token:
                 print(f"🔑 Using GitHub token from: {source}")
                 return token
+        
+        token = self._get_gh_token()
+        if token:
+            print("🔑 Using GitHub token from: gh CLI")
+            return token
                 
         print("⚠️ No GitHub token found. API limits will be severely restricted.")
         print("💡 Set GITHUB_TOKEN env var or run 'gh auth login' for higher limits")
@@ -61,45 +164,170 @@ class GitHubAPILimitHandler:
     
     def _get_gh_token(self) -> Optional[str]:
         """Extract token from GitHub CLI"""
+        return _gh_cli_token()
+    
+    @staticmethod
+    def _rate_limit_from_headers(headers) -> Optional[RateLimit]:
+        """Build a RateLimit from X-RateLimit-* response headers, if present"""
+        if not headers:
+            return None
         try:
-            result = subprocess.run(
-                ["gh", "auth", "token"], 
-                capture_output=True, 
-                text=True,
-                timeout=5
+            return RateLimit(
+                limit=int(headers["X-RateLimit-Limit"]),
+                remaining=int(headers["X-RateLimit-Remaining"]),
+                reset_timestamp=int(headers["X-RateLimit-Reset"]),
+                used=int(headers.get("X-RateLimit-Used", 0))
             )
-            if result.returncode == 0:
-                return result.stdout.strip()
-        except:
+        except (KeyError, TypeError, ValueError):
+            return None
+    
+    def update_from_headers(self, headers) -> Optional[RateLimit]:
+        """Refresh the cached rate limit from a response's X-RateLimit-* headers"""
+        rate_limit = self._rate_limit_from_headers(headers)
+        if rate_limit is not None:
+            self.last_rate_limit = rate_limit
+            self._cache_expiry = time.time() + self.RATE_LIMIT_CACHE_TTL
+            # Quota spent elsewhere (gh subprocesses, other clients) only shows up
+            # in the server's count, so admission must not run ahead of it
+            bucket = self._bucket
+            if bucket is not None:
+                bucket.clamp(rate_limit.remaining - self._bucket_buffer(rate_limit))
+        return rate_limit
+    
+    def _get_connection(self, host: str, timeout: int) -> http.client.HTTPSConnection:
+        """Keep-alive HTTPS connection for this thread (http.client is not thread-safe)"""
+        connections = self._connections.__dict__.setdefault("by_host", {})
+        connection = connections.get(host)
+        if connection is None:
+            connection = connections[host] = http.client.HTTPSConnection(host, timeout=timeout)
+        connection.timeout = timeout
+        return connection
+    
+    def _send(self, url: str, headers: Dict[str, str], timeout: int = 10) -> Tuple[http.client.HTTPMessage, bytes]:
+        """GET url over a reused connection; non-2xx statuses raise urllib.error.HTTPError"""
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        connection = self._get_connection(parts.netloc, timeout)
+        
+        for attempt in range(2):
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # The server dropped the idle keep-alive socket; reconnect once
+                connection.close()
+                if attempt:
+                    raise
+            except OSError:
+                connection.close()
+                raise
+        
+        if not 200 <= response.status < 300:
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+        return response.headers, body
+    
+    @staticmethod
+    def _is_retryable(error: urllib.error.HTTPError) -> bool:
+        """Secondary/primary rate limiting (429, or 403 with no quota left) and server errors"""
+        if error.code == 429 or error.code >= 500:
+            return True
+        return error.code == 403 and (error.headers or {}).get("X-RateLimit-Remaining") == "0"
+    
+    @staticmethod
+    def _retry_delay(error: urllib.error.HTTPError, attempt: int) -> float:
+        """Seconds to wait before retrying: Retry-After, then the rate limit reset, then 2**attempt plus jitter"""
+        headers = error.headers or {}
+        try:
+            if headers.get("Retry-After"):
+                return float(headers["Retry-After"])
+            if headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+                return max(0, int(headers["X-RateLimit-Reset"]) - time.time()) + 1
+        except ValueError:
             pass
-        return None
+        return 2 ** attempt + random.uniform(0, RETRY_JITTER)
     
-    def get_rate_limit_info(self) -> RateLimit:
-        """Get current rate limit status from GitHub API"""
+    def _send_with_retry(self, url: str, headers: Dict[str, str], timeout: int = 10,
+                         attempts: int = MAX_RETRY_ATTEMPTS) -> Tuple[http.client.HTTPMessage, bytes]:
+        """_send() with exponential backoff on rate limiting and 5xx responses"""
+        for attempt in range(attempts):
+            try:
+                return self._send(url, headers, timeout)
+            except urllib.error.HTTPError as e:
+                if not self._is_retryable(e) or attempt == attempts - 1:
+                    raise
+                if e.code in (403, 429) and self._bucket is not None:
+                    self._bucket.penalize()
+                delay = self._retry_delay(e, attempt)
+                if delay > MAX_RETRY_DELAY:
+                    raise
+                print(f"⏳ GitHub API returned {e.code}, retrying in {delay:.0f}s "
+                      f"(attempt {attempt + 1}/{attempts})")
+                time.sleep(delay)
+    
+    def request(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: int = 10):
+        """Perform an authenticated GitHub API GET and track rate limits from its headers"""
+        request_headers = {"Accept": "application/vnd.github+json"}
+        if self.token:
+            request_headers["Authorization"] = f"token {self.token}"
+        request_headers.update(headers or {})
+        
+        try:
+            response_headers, body = self._send_with_retry(url, request_headers, timeout)
+            self.update_from_headers(response_headers)
+        except urllib.error.HTTPError as e:
+            self.update_from_headers(e.headers)
+            raise
+        finally:
+            self.request_count += 1
+        
+        return json.loads(body.decode()) if body else None
+    
+    def get_rate_limit_info(self, force_refresh: bool = False) -> RateLimit:
+        """Get current rate limit status from GitHub API (cached for a short TTL)"""
+        if (not force_refresh and self.last_rate_limit is not None
+                and time.time() < self._cache_expiry):
+            return self.last_rate_limit
+        
         url = "https://api.github.com/rate_limit"
         headers = {}
         
         if self.token:
             headers["Authorization"] = f"token {self.token}"
+        if self._last_etag and self.last_rate_limit is not None:
+            headers["If-None-Match"] = self._last_etag
             
         try:
-            request = urllib.request.Request(url, headers=headers)
-            with urllib.request.urlopen(request, timeout=10) as response:
-                data = json.loads(response.read().decode())
+            try:
+                response_headers, body = self._send_with_retry(url, headers)
+            except urllib.error.HTTPError as e:
+                if e.code != 304:
+                    raise
+                # Not modified: headers still carry the current core limits
+                if self.update_from_headers(e.headers) is None:
+                    self._cache_expiry = time.time() + self.RATE_LIMIT_CACHE_TTL
+                return self.last_rate_limit
             
-            core_limits = data["rate"]["core"]
-            rate_limit = RateLimit(
-                limit=core_limits["limit"],
-                remaining=core_limits["remaining"], 
-                reset_timestamp=core_limits["reset"],
-                used=core_limits["used"]
-            )
-            
-            self.last_rate_limit = rate_limit
+            self._last_etag = response_headers.get("ETag")
+            rate_limit = self.update_from_headers(response_headers)
+            if rate_limit is None:
+                core_limits = json.loads(body.decode())["rate"]["core"]
+                rate_limit = RateLimit(
+                    limit=core_limits["limit"],
+                    remaining=core_limits["remaining"], 
+                    reset_timestamp=core_limits["reset"],
+                    used=core_limits["used"]
+                )
+                self.last_rate_limit = rate_limit
+                self._cache_expiry = time.time() + self.RATE_LIMIT_CACHE_TTL
             return rate_limit
             
         except Exception as e:
             print(f"⚠️ Could not fetch rate limit info: {e}")
+            # Prefer the last real snapshot over guessed defaults
+            if self.last_rate_limit is not None:
+                return self.last_rate_limit
             # Return conservative defaults
             return RateLimit(
                 limit=60 if not self.token else 5000,
@@ -108,33 +336,63 @@ class GitHubAPILimitHandler:
                 used=0
             )
     
+    def _bucket_is_current(self) -> bool:
+        """Whether the admission bucket still describes the current rate limit window"""
+        # Rate limit state is normally kept current by response headers from
+        # request(); the bucket only needs rebuilding on first use or once the
+        # known window has already reset
+        rate_limit = self.last_rate_limit
+        return self._bucket is not None and rate_limit is not None and rate_limit.time_until_reset > 0
+    
+    @staticmethod
+    def _bucket_buffer(rate_limit: RateLimit) -> float:
+        """Conservative buffer (keep 10% of limit in reserve)"""
+        return max(10, rate_limit.limit * 0.1)
+    
+    def _get_bucket(self) -> "TokenBucket":
+        """Return the admission bucket, rebuilding it when the rate limit window resets"""
+        # Lock-free fast path: workers only contend on the lock (and the network
+        # probe it guards) when the bucket has to be rebuilt
+        if self._bucket_is_current():
+            return self._bucket
+        
+        with self.rate_limit_lock:
+            if not self._bucket_is_current():
+                rate_limit = self.get_rate_limit_info()
+                buffer = self._bucket_buffer(rate_limit)
+                self._bucket = TokenBucket(
+                    capacity=max(1, rate_limit.limit - buffer),
+                    refill_per_sec=rate_limit.limit / 3600.0,
+                    tokens=rate_limit.remaining - buffer
+                )
+            return self._bucket
+    
     def check_rate_limit_before_request(self, requests_needed: int = 1) -> bool:
         """Check if we can make requests without hitting limits"""
-        with self.rate_limit_lock:
-            rate_limit = self.get_rate_limit_info()
-            
-            # Conservative buffer (keep 10% of limit in reserve)
-            buffer = max(10, rate_limit.limit * 0.1)
-            available = rate_limit.remaining - buffer
-            
-            if available >= requests_needed:
-                return True
-            
-            # We're near the limit
-            wait_time = rate_limit.time_until_reset
+        wait_time = self._get_bucket().acquire(requests_needed)
+        if wait_time <= 0:
+            return True
+        
+        # Not enough budget yet: wait for the bucket to refill rather than for the reset
+        rate_limit = self.last_rate_limit
+        if rate_limit is not None:
             print(f"⏳ Rate limit approaching: {rate_limit.remaining}/{rate_limit.limit}")
-            print(f"⏳ Waiting {wait_time}s until reset ({rate_limit.reset_time})")
-            
-            if wait_time < 300:  # Less than 5 minutes
-                time.sleep(wait_time + 5)  # Add 5s buffer
-                return True
-            else:
+        
+        while wait_time > 0:
+            # The window reset restores the full quota, so never wait past it
+            if self.last_rate_limit is not None:
+                wait_time = min(wait_time, self.last_rate_limit.time_until_reset + 1)
+            if wait_time >= 300:  # 5 minutes or more
                 print("⚠️ Rate limit reset too far away. Reduce concurrency or try later.")
                 return False
+            print(f"⏳ Waiting {wait_time:.1f}s for rate limit budget")
+            time.sleep(wait_time)
+            wait_time = self._get_bucket().acquire(requests_needed)
+        return True
     
-    def get_optimal_worker_count(self) -> int:
+    def get_optimal_worker_count(self, rate_limit: Optional[RateLimit] = None) -> int:
         """Calculate optimal worker count based on rate limits"""
-        rate_limit = self.get_rate_limit_info()
+        rate_limit = rate_limit or self.get_rate_limit_info()
         
         # Each worker typically makes 3-5 API calls per job
         calls_per_worker = 4
@@ -174,7 +432,7 @@ class GitHubAPILimitHandler:
         
         return {
             "authenticated": bool(self.token),
-            "token_type": self._detect_token_type(),
+            "token_type": self._detect_token_type(rate_limit),
             "rate_limit": {
                 "limit": rate_limit.limit,
                 "remaining": rate_limit.remaining,
@@ -182,18 +440,18 @@ class GitHubAPILimitHandler:
                 "usage_percent": (rate_limit.used / rate_limit.limit) * 100
             },
             "recommendations": {
-                "max_workers": self.get_optimal_worker_count(),
-                "batch_size": self._get_optimal_batch_size(),
-                "wait_between_batches": self._get_wait_time()
+                "max_workers": self.get_optimal_worker_count(rate_limit),
+                "batch_size": self._get_optimal_batch_size(rate_limit),
+                "wait_between_batches": self._get_wait_time(rate_limit)
             }
         }
     
-    def _detect_token_type(self) -> str:
+    def _detect_token_type(self, rate_limit: Optional[RateLimit] = None) -> str:
         """Detect the type of GitHub token being used"""
         if not self.token:
             return "unauthenticated"
         
-        rate_limit = self.get_rate_limit_info()
+        rate_limit = rate_limit or self.get_rate_limit_info()
         
         if rate_limit.limit >= 15000:
             return "github_app_installation"
@@ -204,9 +462,9 @@ class GitHubAPILimitHandler:
         else:
             return "basic_auth_or_limited"
     
-    def _get_optimal_batch_size(self) -> int:
+    def _get_optimal_batch_size(self, rate_limit: Optional[RateLimit] = None) -> int:
         """Get optimal batch size for processing jobs"""
-        rate_limit = self.get_rate_limit_info()
+        rate_limit = rate_limit or self.get_rate_limit_info()
         
         if rate_limit.limit >= 5000:
             return 20  # Can handle large batches
@@ -215,9 +473,9 @@ class GitHubAPILimitHandler:
         else:
             return 5   # Small batches
     
-    def _get_wait_time(self) -> float:
+    def _get_wait_time(self, rate_limit: Optional[RateLimit] = None) -> float:
         """Get recommended wait time between API calls"""
-        rate_limit = self.get_rate_limit_info()
+        rate_limit = rate_limit or self.get_rate_limit_info()
         
         if rate_limit.limit >= 5000:
             return 0.1  # 100ms between calls
@@ -8,18 +8,103 @@ and provides intelligent fixes based on error patterns and common failure scenar
 
 import os
 import sys
+import hashlib
 import subprocess
 import json
+import re
 import asyncio
-import concurrent.futures
+import importlib.util
 from pathlib import Path
 from typing import List, Dict, Optional
 
+# Claude prompt templates, filled with %-formatting per workflow
+FAILURE_FIX_PROMPT = """Fix this GitHub Actions workflow based on actual failure analysis:
+
+%(context)sCurrent workflow:
+```yaml
+%(workflow)s
+```
+
+Please fix the workflow to address the specific failures identified above. Focus on:
+1. Resolving the root cause of the identified errors
+2. Adding proper error handling and fallbacks
+3. Improving robustness to prevent similar failures
+4. Maintaining workflow functionality while fixing issues
+
+Output only the corrected YAML content."""
+
+BASIC_FIX_PROMPT = """Analyze and fix common issues in this GitHub Actions workflow:
+            
+Current workflow:
+```yaml
+%(workflow)s
+```
+
+Fix these common issues:
+- Outdated action versions
+- YAML syntax errors
+- Missing required dependencies  
+- Permission problems
+- Broken caching configurations
+- Matrix build issues
+- Environment variable problems
+
+Output only the fixed YAML content."""
+
+# Files at the repository root that identify each language, in priority order
+PROJECT_INDICATORS = {
+    'python': ['requirements.txt', 'pyproject.toml', 'setup.py', 'Pipfile', '*.py'],
+    'node': ['package.json', 'yarn.lock', 'pnpm-lock.yaml'],
+    'rust': ['Cargo.toml'],
+    'go': ['go.mod', 'go.sum'],
+    'java': ['pom.xml', 'build.gradle', 'build.gradle.kts'],
+    'php': ['composer.json'],
+    'ruby': ['Gemfile', 'Rakefile'],
+    'dotnet': ['*.csproj', '*.sln'],
+    'docker': ['Dockerfile', 'docker-compose.yml']
+}
+# Exact file names and '*.ext' suffixes mapped to (language, indicator priority)
+EXACT_INDICATORS = {name: (lang, rank) for lang, names in PROJECT_INDICATORS.items()
+                    for rank, name in enumerate(names) if not name.startswith('*')}
+SUFFIX_INDICATORS = {name[1:]: (lang, rank) for lang, names in PROJECT_INDICATORS.items()
+                     for rank, name in enumerate(names) if name.startswith('*')}
+
+# Directories never worth descending into when looking for tests
+SKIP_DIRS = frozenset({'.git', 'node_modules', 'venv', '.venv', 'target', 'dist', 'build', '__pycache__'})
+TEST_DIR_NAMES = frozenset({'tests', 'spec', '__tests__'})
+TEST_FILE_SUFFIXES = ('.py', '.js', '.go', '.rs')
+TEST_SEARCH_MAX_DEPTH = 8
+DEFAULT_MAX_WORKERS = 4
+WORKFLOW_SUFFIXES = ('.yml', '.yaml')
+CLAUDE_TIMEOUT = 60  # seconds per Claude CLI call
+
+# Fenced code blocks in Claude responses; an unterminated ```yaml block runs to the end
+_YAML_FENCE_RE = re.compile(r"```yaml[^\n]*\n?(.*?)(?:```|\Z)", re.DOTALL)
+_FENCE_RE = re.compile(r"```[^\n]*\n(.*?)```", re.DOTALL)
+
+def _load_api_limit_handler():
+    """Load api-limit-handler.py (not importable by name because of the dash)."""
+    spec = importlib.util.spec_from_file_location(
+        "api_limit_handler", Path(__file__).parent / "api-limit-handler.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
 class EnhancedGitHubActionsAgent:
     def __init__(self, repo_path: str = "."):
         self.repo_path = Path(repo_path).resolve()
         self.workflows_dir = self.repo_path / ".github" / "workflows"
         
+        # Claude responses keyed by prompt hash; concurrent identical prompts wait
+        # on the in-flight call instead of spawning another subprocess
+        self._claude_cache: Dict[str, str] = {}
+        self._claude_inflight: Dict[str, asyncio.Future] = {}
+        self._claude_semaphore: Optional[asyncio.Semaphore] = None
+        
+        # Outcome of previous fix attempts, keyed by workflow file name
+        self.fix_cache_file = self.repo_path / ".github" / ".workflow_fix_cache.json"
+        self._fix_cache: Optional[Dict[str, Dict]] = None
+        
         # Import failure analyzer
         sys.path.append(str(Path(__file__).parent))
         try:
@@ -40,25 +125,25 @@ class EnhancedGitHubActionsAgent:
             "project_files": []
         }
         
-        # Language detection
-        project_indicators = {
-            'python': ['requirements.txt', 'pyproject.toml', 'setup.py', 'Pipfile', '*.py'],
-            'node': ['package.json', 'yarn.lock', 'pnpm-lock.yaml'],
-            'rust': ['Cargo.toml'],
-            'go': ['go.mod', 'go.sum'],
-            'java': ['pom.xml', 'build.gradle', 'build.gradle.kts'],
-            'php': ['composer.json'],
-            'ruby': ['Gemfile', 'Rakefile'],
-            'dotnet': ['*.csproj', '*.sln'],
-            'docker': ['Dockerfile', 'docker-compose.yml']
-        }
+        # Language detection: classify the repository root listing in one pass,
+        # keeping the files of each language's highest-priority indicator
+        found: Dict[str, List] = {}
+        try:
+            with os.scandir(self.repo_path) as entries:
+                for entry in entries:
+                    match = (EXACT_INDICATORS.get(entry.name)
+                             or SUFFIX_INDICATORS.get(os.path.splitext(entry.name)[1]))
+                    if match:
+                        found.setdefault(match[0], []).append((match[1], entry.name))
+        except OSError:
+            pass
         
-        for lang, indicators in project_indicators.items():
-            for indicator in indicators:
-                if list(self.repo_path.glob(indicator)):
-                    info["languages"].append(lang)
-                    info["project_files"].extend([str(f) for f in self.repo_path.glob(indicator)])
-                    break
+        for lang in PROJECT_INDICATORS:
+            if lang in found:
+                best_rank = min(rank for rank, _ in found[lang])
+                info["languages"].append(lang)
+                info["project_files"].extend(
+                    str(self.repo_path / name) for rank, name in sorted(found[lang]) if rank == best_rank)
         
         # Primary type
         if 'python' in info["languages"]:
@@ -69,59 +154,146 @@ class EnhancedGitHubActionsAgent:
             info["type"] = info["languages"][0]
         
         # Test detection
-        test_patterns = ['**/test*.py', '**/test*.js', '**/test*.go', '**/test*.rs', 
-                        '**/tests/**', '**/spec/**', '**/__tests__/**']
-        for pattern in test_patterns:
-            if list(self.repo_path.glob(pattern)):
-                info["has_tests"] = True
-                break
+        info["has_tests"] = self.has_tests()
         
         # Workflow detection
         info["has_workflows"] = self.has_workflows()
         
         return info
     
+    def has_tests(self, max_depth: int = TEST_SEARCH_MAX_DEPTH) -> bool:
+        """Check for test files or directories with a single pruned walk."""
+        root_depth = len(self.repo_path.parts)
+        for root, dirs, files in os.walk(self.repo_path):
+            if TEST_DIR_NAMES.intersection(dirs):
+                return True
+            if any(f.startswith("test") and f.endswith(TEST_FILE_SUFFIXES) for f in files):
+                return True
+            
+            # Prune dependency/build directories and stop descending past max_depth
+            if len(Path(root).parts) - root_depth >= max_depth:
+                dirs[:] = []
+            else:
+                dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        return False
+    
     def has_workflows(self) -> bool:
         """Check if repository has GitHub Actions workflows."""
-        if not self.workflows_dir.exists():
+        try:
+            with os.scandir(self.workflows_dir) as entries:
+                return any(entry.name.endswith(WORKFLOW_SUFFIXES) for entry in entries)
+        except OSError:
             return False
-        return any(self.workflows_dir.glob("*.yml")) or any(self.workflows_dir.glob("*.yaml"))
     
     def get_workflow_files(self) -> List[Path]:
         """Get all workflow files."""
-        if not self.workflows_dir.exists():
+        try:
+            with os.scandir(self.workflows_dir) as entries:
+                return [Path(entry.path) for entry in entries if entry.name.endswith(WORKFLOW_SUFFIXES)]
+        except OSError:
             return []
-        workflows = []
-        workflows.extend(self.workflows_dir.glob("*.yml"))
-        workflows.extend(self.workflows_dir.glob("*.yaml"))
-        return workflows
     
     def run_claude_subprocess(self, prompt: str, task_name: str = "") -> str:
-        """Run Claude CLI in subprocess with optimized prompt."""
-        cmd = ["claude", "--print", prompt]
+        """Run Claude CLI in subprocess with optimized prompt (blocking)."""
+        return asyncio.run(self.run_claude_async(prompt, task_name))
+    
+    async def run_claude_async(self, prompt: str, task_name: str = "") -> str:
+        """Run Claude CLI, sharing results between identical prompts."""
+        key = hashlib.blake2b(prompt.encode()).hexdigest()
+        if key in self._claude_cache:
+            return self._claude_cache[key]
+        
+        inflight = self._claude_inflight.get(key)
+        if inflight is not None:
+            # Another task is already running this exact prompt
+            return await asyncio.shield(inflight)
+        
+        inflight = self._claude_inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            if self._claude_semaphore is not None:
+                async with self._claude_semaphore:
+                    response = await self._run_claude(prompt, task_name)
+            else:
+                response = await self._run_claude(prompt, task_name)
+            if response:
+                self._claude_cache[key] = response
+            return response
+        finally:
+            del self._claude_inflight[key]
+            inflight.set_result(self._claude_cache.get(key, ""))
+    
+    async def _run_claude(self, prompt: str, task_name: str = "") -> str:
+        """Run Claude CLI in subprocess, stopping once a complete YAML block is emitted."""
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                "claude", "--print", prompt,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                cwd=self.repo_path)
+        except Exception as e:
+            print(f"❌ Error running Claude for {task_name}: {e}")
+            return ""
+        
+        lines = []
+        
+        async def read_output() -> bool:
+            in_yaml = False
+            async for line in proc.stdout:
+                line = line.decode()
+                lines.append(line)
+                if not in_yaml:
+                    in_yaml = "```yaml" in line
+                elif line.lstrip().startswith("```"):
+                    return True
+            return False
+        
+        # Drain stderr alongside stdout so a chatty CLI can't fill the pipe and stall
+        stderr_task = asyncio.ensure_future(proc.stderr.read())
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, 
-                                  cwd=self.repo_path, timeout=60)
-            if result.returncode != 0:
-                print(f"❌ Claude error for {task_name}: {result.stderr}")
-                return ""
-            return result.stdout
-        except subprocess.TimeoutExpired:
+            yaml_complete = await asyncio.wait_for(read_output(), CLAUDE_TIMEOUT)
+            if yaml_complete:
+                # The fenced YAML is all we use; skip the trailing prose
+                stderr_task.cancel()
+                try:
+                    proc.terminate()
+                except ProcessLookupError:
+                    pass  # already exited on its own
+                await proc.wait()
+                return "".join(lines)
+            stderr = await stderr_task
+            await proc.wait()
+        except asyncio.TimeoutError:
+            await self._stop_claude(proc, stderr_task)
             print(f"⏰ Claude timeout for {task_name}")
             return ""
         except Exception as e:
+            await self._stop_claude(proc, stderr_task)
             print(f"❌ Error running Claude for {task_name}: {e}")
             return ""
+        
+        if proc.returncode != 0:
+            print(f"❌ Claude error for {task_name}: {stderr.decode()}")
+            return ""
+        return "".join(lines)
+    
+    @staticmethod
+    async def _stop_claude(proc, stderr_task):
+        """Cancel the stderr reader and kill a Claude process that is being abandoned."""
+        stderr_task.cancel()
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+        await proc.wait()
     
     def extract_yaml_content(self, response: str) -> str:
         """Extract YAML from Claude response."""
-        if "```yaml" in response:
-            return response.split("```yaml")[1].split("```")[0].strip()
-        elif "```" in response:
-            parts = response.split("```")
-            for i, part in enumerate(parts):
-                if "name:" in part and ("on:" in part or "jobs:" in part):
-                    return part.strip()
+        match = _YAML_FENCE_RE.search(response)
+        if match:
+            return match.group(1).strip()
+        for match in _FENCE_RE.finditer(response):
+            block = match.group(1)
+            if "name:" in block and ("on:" in block or "jobs:" in block):
+                return block.strip()
         return response.strip()
     
     def analyze_real_failures(self) -> List[Dict]:
@@ -138,93 +310,148 @@ class EnhancedGitHubActionsAgent:
             print(f"⚠️  Could not analyze failures: {e}")
             return []
     
-    def fix_workflow_with_failure_context(self, workflow_file: Path, failure_analysis: Dict) -> Dict:
+    @staticmethod
+    def _failure_signature(failure_analysis: Dict) -> str:
+        """Stable digest of the failure details that feed a fix prompt."""
+        payload = json.dumps({"run_id": failure_analysis.get("run_id"),
+                              "job_analyses": failure_analysis.get("job_analyses", {})},
+                             sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode()).hexdigest()
+    
+    def _load_fix_cache(self) -> Dict[str, Dict]:
+        """Previous fix attempts per workflow file, persisted between runs."""
+        if self._fix_cache is None:
+            try:
+                with open(self.fix_cache_file, 'r') as f:
+                    self._fix_cache = json.load(f)
+            except (OSError, ValueError):
+                self._fix_cache = {}
+        return self._fix_cache
+    
+    def _fix_cache_hit(self, workflow_file: Path, signature: str) -> bool:
+        """Whether this workflow was already attempted with the same content and failure context."""
+        entry = self._load_fix_cache().get(workflow_file.name)
+        if not entry or entry.get("signature") != signature:
+            return False
+        try:
+            if workflow_file.stat().st_mtime_ns == entry.get("mtime_ns"):
+                return True
+            # Touched but possibly unchanged: fall back to comparing content
+            return hashlib.blake2b(workflow_file.read_bytes()).hexdigest() == entry.get("digest")
+        except OSError:
+            return False
+    
+    def _record_fix_attempt(self, workflow_file: Path, signature: str, status: str):
+        """Remember the outcome for the workflow's current content."""
+        try:
+            cache = self._load_fix_cache()
+            cache[workflow_file.name] = {
+                "mtime_ns": workflow_file.stat().st_mtime_ns,
+                "digest": hashlib.blake2b(workflow_file.read_bytes()).hexdigest(),
+                "signature": signature,
+                "status": status
+            }
+            tmp_file = self.fix_cache_file.with_suffix(".tmp")
+            with open(tmp_file, 'w') as f:
+                json.dump(cache, f, indent=2)
+            os.replace(tmp_file, self.fix_cache_file)
+        except OSError as e:
+            print(f"⚠️  Could not update fix cache: {e}")
+    
+    async def fix_workflow_with_failure_context(self, workflow_file: Path, failure_analysis: Dict) -> Dict:
         """Fix workflow based on actual failure analysis."""
+        signature = self._failure_signature(failure_analysis)
+        if self._fix_cache_hit(workflow_file, signature):
+            return {"status": "skipped", "file": workflow_file.name,
+                    "error": "Unchanged since last fix attempt"}
         try:
             with open(workflow_file, 'r') as f:
                 current_content = f.read()
             
             # Build context-aware prompt based on failure analysis
-            failure_context = ""
+            context_parts = []
             if failure_analysis.get('job_analyses'):
-                failure_context = "Recent failure analysis:\n"
+                context_parts.append("Recent failure analysis:")
                 for job_name, analysis in failure_analysis['job_analyses'].items():
                     if analysis['error_type'] != 'unknown':
-                        failure_context += f"- Job '{job_name}': {analysis['error_message']}\n"
-                        failure_context += f"  Error type: {analysis['error_type']}\n"
+                        context_parts.append(f"- Job '{job_name}': {analysis['error_message']}")
+                        context_parts.append(f"  Error type: {analysis['error_type']}")
                         if analysis['suggested_fixes']:
-                            failure_context += f"  Suggested fixes: {', '.join(analysis['suggested_fixes'][:2])}\n"
+                            context_parts.append(f"  Suggested fixes: {', '.join(analysis['suggested_fixes'][:2])}")
                         if analysis['workflow_changes']:
-                            failure_context += f"  Workflow changes needed: {', '.join(analysis['workflow_changes'][:2])}\n"
-                failure_context += "\n"
+                            context_parts.append(f"  Workflow changes needed: {', '.join(analysis['workflow_changes'][:2])}")
+                context_parts.append("\n")
+            failure_context = "\n".join(context_parts)
             
-            prompt = f"""Fix this GitHub Actions workflow based on actual failure analysis:
-
-{failure_context}Current workflow:
-```yaml
-{current_content}
-```
-
-Please fix the workflow to address the specific failures identified above. Focus on:
-1. Resolving the root cause of the identified errors
-2. Adding proper error handling and fallbacks
-3. Improving robustness to prevent similar failures
-4. Maintaining workflow functionality while fixing issues
-
-Output only the corrected YAML content."""
+            prompt = FAILURE_FIX_PROMPT % {"context": failure_context, "workflow": current_content}
             
-            response = self.run_claude_subprocess(prompt, f"fix {workflow_file.name} with failure context")
+            response = await self.run_claude_async(prompt, f"fix {workflow_file.name} with failure context")
             
             if response:
                 fixed_content = self.extract_yaml_content(response)
                 if fixed_content and "name:" in fixed_content:
                     with open(workflow_file, 'w') as f:
                         f.write(fixed_content)
+                    self._record_fix_attempt(workflow_file, signature, "success")
                     return {"status": "success", "file": workflow_file.name, "context": "failure_analysis"}
             
+            self._record_fix_attempt(workflow_file, signature, "failed")
             return {"status": "failed", "file": workflow_file.name, "error": "No valid fix generated"}
                 
         except Exception as e:
             return {"status": "error", "file": workflow_file.name, "error": str(e)}
     
-    def fix_workflow_basic(self, workflow_file: Path) -> Dict:
+    async def fix_workflow_basic(self, workflow_file: Path) -> Dict:
         """Basic workflow fix without failure context."""
+        if self._fix_cache_hit(workflow_file, "basic"):
+            return {"status": "skipped", "file": workflow_file.name,
+                    "error": "Unchanged since last fix attempt"}
         try:
             with open(workflow_file, 'r') as f:
                 current_content = f.read()
             
-            prompt = f"""Analyze and fix common issues in this GitHub Actions workflow:
+            prompt = BASIC_FIX_PROMPT % {"workflow": current_content}
             
-Current workflow:
-```yaml
-{current_content}
-```
-
-Fix these common issues:
-- Outdated action versions
-- YAML syntax errors
-- Missing required dependencies  
-- Permission problems
-- Broken caching configurations
-- Matrix build issues
-- Environment variable problems
-
-Output only the fixed YAML content."""
-            
-            response = self.run_claude_subprocess(prompt, f"basic fix {workflow_file.name}")
+            response = await self.run_claude_async(prompt, f"basic fix {workflow_file.name}")
             
             if response:
                 fixed_content = self.extract_yaml_content(response)
                 if fixed_content and "name:" in fixed_content:
                     with open(workflow_file, 'w') as f:
                         f.write(fixed_content)
+                    self._record_fix_attempt(workflow_file, "basic", "success")
                     return {"status": "success", "file": workflow_file.name, "context": "basic"}
             
+            self._record_fix_attempt(workflow_file, "basic", "failed")
             return {"status": "failed", "file": workflow_file.name, "error": "No valid fix generated"}
                 
         except Exception as e:
             return {"status": "error", "file": workflow_file.name, "error": str(e)}
     
+    @staticmethod
+    def _failure_severity(failure_analysis: Dict) -> float:
+        """Highest confidence among the identified job failures of a run."""
+        return max((analysis.get('confidence', 0.0)
+                    for analysis in failure_analysis.get('job_analyses', {}).values()
+                    if analysis.get('error_type') != 'unknown'), default=0.0)
+    
+    def _get_worker_count(self, task_count: int) -> int:
+        """Worker count for concurrent fixes, bounded by the GitHub rate limit handler."""
+        try:
+            handler = _load_api_limit_handler().GitHubAPILimitHandler()
+            max_workers = handler.get_optimal_worker_count()
+        except Exception:
+            max_workers = DEFAULT_MAX_WORKERS
+        return max(1, min(max_workers, task_count))
+    
+    async def _run_bounded(self, coroutines: List, max_workers: int) -> List:
+        """Run coroutines concurrently with at most max_workers Claude calls in flight."""
+        self._claude_semaphore = asyncio.Semaphore(max_workers)
+        try:
+            return await asyncio.gather(*coroutines)
+        finally:
+            self._claude_semaphore = None
+    
     def fix_failing_workflows_intelligently(self) -> bool:
         """Fix workflows using intelligent failure analysis."""
         print("🔨 Intelligent Workflow Failure Analysis & Fixing")
@@ -240,11 +467,13 @@ Output only the fixed YAML content."""
                 results = []
                 for workflow_file in workflows:
                     print(f"🔍 Basic check: {workflow_file.name}")
-                    result = self.fix_workflow_basic(workflow_file)
+                    result = asyncio.run(self.fix_workflow_basic(workflow_file))
                     results.append(result)
                     
                     if result["status"] == "success":
                         print(f"✅ {result['file']} (basic fixes applied)")
+                    elif result["status"] == "skipped":
+                        print(f"⏭️  {result['file']}: {result['error']}")
                     else:
                         print(f"❌ {result['file']}: {result.get('error', 'Failed')}")
                 
@@ -271,17 +500,26 @@ Output only the fixed YAML content."""
                     workflow_failures[workflow_file] = []
                 workflow_failures[workflow_file].append(analysis)
         
-        # Fix each workflow with failure context
-        results = []
+        # Use the most recent failure analysis for each workflow, and start the
+        # most severe (highest-confidence) failures first
+        fix_tasks = []
         for workflow_file, analyses in workflow_failures.items():
-            print(f"🔧 Fixing {workflow_file.name} based on {len(analyses)} failure(s)")
-            
-            # Use the most recent failure analysis
             latest_analysis = max(analyses, key=lambda x: x.get('created_at', ''))
-            
-            result = self.fix_workflow_with_failure_context(workflow_file, latest_analysis)
-            results.append(result)
-            
+            fix_tasks.append((workflow_file, latest_analysis, len(analyses)))
+        fix_tasks.sort(key=lambda task: self._failure_severity(task[1]), reverse=True)
+        
+        for workflow_file, _, failure_count in fix_tasks:
+            print(f"🔧 Fixing {workflow_file.name} based on {failure_count} failure(s)")
+        
+        # Fix each workflow with failure context concurrently
+        max_workers = self._get_worker_count(len(fix_tasks))
+        results = asyncio.run(self._run_bounded(
+            [self.fix_workflow_with_failure_context(workflow_file, latest_analysis)
+             for workflow_file, latest_analysis, _ in fix_tasks],
+            max_workers
+        ))
+        
+        for (_, latest_analysis, _), result in zip(fix_tasks, results):
             if result["status"] == "success":
                 print(f"✅ {result['file']} (fixed based on failure analysis)")
                 
@@ -290,6 +528,8 @@ Output only the fixed YAML content."""
                     for job_name, job_analysis in latest_analysis['job_analyses'].items():
                         if job_analysis['error_type'] != 'unknown':
                             print(f"   🎯 Addressed: {job_analysis['error_message']}")
+            elif result["status"] == "skipped":
+                print(f"⏭️  {result['file']}: {result['error']}")
             else:
                 print(f"❌ {result['file']}: {result.get('error', 'Failed')}")
         
@@ -13,19 +13,200 @@ Usage from Claude:
 
 import os
 import sys
-import subprocess
+import copy
+import shutil
+import hashlib
 import json
+import re
 import asyncio
-import concurrent.futures
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, Final, List, Dict, Optional, Set, Tuple
+
+try:
+    import orjson  # optional: faster JSON for the config and workflow cache
+except ImportError:
+    orjson = None
+
+# Files at the repository root that identify each language, in priority order
+PROJECT_INDICATORS: Final[Dict[str, Tuple[str, ...]]] = {
+    'python': ('requirements.txt', 'pyproject.toml', 'setup.py', 'Pipfile', '*.py'),
+    'node': ('package.json', 'yarn.lock', 'pnpm-lock.yaml'),
+    'rust': ('Cargo.toml',),
+    'go': ('go.mod', 'go.sum'),
+    'java': ('pom.xml', 'build.gradle', 'build.gradle.kts'),
+    'php': ('composer.json',),
+    'ruby': ('Gemfile', 'Rakefile'),
+    'dotnet': ('*.csproj', '*.sln'),
+    'docker': ('Dockerfile', 'docker-compose.yml')
+}
+# Exact file names and '*.ext' suffixes mapped to (language, indicator priority)
+EXACT_INDICATORS: Final[Dict[str, Tuple[str, int]]] = {
+    name: (lang, rank) for lang, names in PROJECT_INDICATORS.items()
+    for rank, name in enumerate(names) if not name.startswith('*')}
+SUFFIX_INDICATORS: Final[Dict[str, Tuple[str, int]]] = {
+    name[1:]: (lang, rank) for lang, names in PROJECT_INDICATORS.items()
+    for rank, name in enumerate(names) if name.startswith('*')}
+
+TEST_PATTERNS: Final[Tuple[str, ...]] = (
+    '**/test*.py', '**/test*.js', '**/test*.go', '**/test*.rs',
+    '**/tests/**', '**/spec/**', '**/__tests__/**')
+TEST_DIR_NAMES: Final = frozenset({'tests', 'spec', '__tests__'})
+TEST_FILE_SUFFIXES: Final = ('.py', '.js', '.go', '.rs')
+
+WORKFLOW_SUFFIXES = ('.yml', '.yaml')
+
+CLAUDE_TIMEOUT = 60  # default seconds per Claude call
+DEFAULT_MAX_WORKERS = 8  # matches api_settings.default_workers in config.json
+APP_CONFIG_FILE = Path.home() / ".claude" / "github-actions-improver" / "config.json"
+WORKFLOW_CACHE_FILE = APP_CONFIG_FILE.with_name("workflow_cache.json")
+CLAUDE_PATH_CACHE_FILE = APP_CONFIG_FILE.with_name(".claude_path")
+BATCH_TIMEOUT_CAP = 300  # seconds for a whole batched request
+MIN_WORKFLOW_SIZE = 32  # stripped workflows shorter than this are left alone
+
+# Instructions per operation for batched prompts (mirror the per-file prompts)
+BATCH_INSTRUCTIONS = {
+    "improve": """Improve each workflow with modern best practices:
+- Update to latest action versions with SHA pinning
+- Add security hardening
+- Optimize caching strategies
+- Add proper permissions (principle of least privilege)
+- Improve matrix configurations
+- Add concurrency controls""",
+    "fix": """Analyze and fix common issues in each workflow:
+- Outdated action versions
+- YAML syntax errors
+- Missing required dependencies
+- Permission problems
+- Broken caching configurations
+- Matrix build issues
+- Environment variable problems"""
+}
+BATCH_INSTRUCTIONS["improve_and_fix"] = (
+    BATCH_INSTRUCTIONS["fix"] + "\n\n" + BATCH_INSTRUCTIONS["improve"]
+)
+
+IMPROVE_AND_FIX_PROMPT = """Fix and improve this GitHub Actions workflow in a single pass.
+
+Current workflow:
+```yaml
+%(content)s
+```
+
+%(instructions)s
+
+Output only the updated YAML content."""
+
+BATCH_PROMPT = """You are given %(count)d GitHub Actions workflow files.
+
+%(instructions)s
+
+%(files)s
+
+Respond in the same layout: for each file, a "### FILE: <name>" line (name exactly
+as given above) followed by a ```yaml fenced block with its complete updated
+content. Output nothing else."""
+
+_JSON_FENCE_RE = re.compile(r"```json\s*\n(.*?)```", re.DOTALL)
+_YAML_FENCE_RE = re.compile(r"```yaml[^\n]*\n?(.*?)(?:```|\Z)", re.DOTALL)
+_FENCE_RE = re.compile(r"```[^\n]*\n(.*?)```", re.DOTALL)
+_FILE_HEADER_RE = re.compile(r"###\s*FILE:\s*(\S+)")
+_FILE_FENCE_RE = re.compile(r"###\s*FILE:\s*(\S+)\s*\n```[^\n]*\n(.*?)```", re.DOTALL)
+
+def _json_loads(data: bytes):
+    """Parse JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _json_dumps(obj) -> bytes:
+    """Serialize obj as indented UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode()
+
+def _is_workflow_entry(entry: os.DirEntry) -> bool:
+    """Whether a workflows directory entry is a .yml/.yaml file."""
+    return entry.name.endswith(WORKFLOW_SUFFIXES) and entry.is_file(follow_symlinks=False)
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    """Modification time of path in nanoseconds, or None if it does not exist."""
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+def _find_claude_cli() -> Optional[str]:
+    """Locate the claude executable, remembering it so later runs skip the PATH search."""
+    try:
+        cached = CLAUDE_PATH_CACHE_FILE.read_text(encoding="utf-8").strip()
+        if cached and os.access(cached, os.X_OK):
+            return cached
+    except OSError:
+        pass
+    
+    claude_bin = shutil.which("claude")
+    if claude_bin:
+        try:
+            CLAUDE_PATH_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            CLAUDE_PATH_CACHE_FILE.write_text(claude_bin + "\n", encoding="utf-8")
+        except OSError:
+            pass
+    return claude_bin
+
+def _load_max_workers() -> int:
+    """Concurrent Claude call limit from config.json (api_settings.default_workers)."""
+    try:
+        with open(APP_CONFIG_FILE, 'rb') as f:
+            workers = int(_json_loads(f.read())["api_settings"]["default_workers"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return DEFAULT_MAX_WORKERS
+    return max(1, workers)
+
+class _FenceTokenizer:
+    """Incrementally split streamed '### FILE: name' + fenced YAML output into blocks."""
+    
+    def __init__(self):
+        self.name: Optional[str] = None
+        self.lines: Optional[List[str]] = None
+    
+    def feed(self, line: str) -> Optional[Tuple[str, str]]:
+        """Consume one output line; return (name, yaml) when a file's fence closes."""
+        stripped = line.strip()
+        if self.lines is None:
+            match = _FILE_HEADER_RE.match(stripped)
+            if match:
+                self.name = match.group(1)
+            elif stripped.startswith("```") and self.name:
+                self.lines = []
+            return None
+        if stripped.startswith("```"):
+            block = (self.name, "".join(self.lines).strip())
+            self.name = self.lines = None
+            return block
+        self.lines.append(line)
+        return None
 
 class GitHubActionsAgent:
-    def __init__(self, repo_path: str = "."):
+    def __init__(self, repo_path: str = ".", claude_bin: str = "claude",
+                 max_workers: Optional[int] = None, timeout: int = CLAUDE_TIMEOUT):
         self.repo_path = Path(repo_path).resolve()
+        self.claude_bin = claude_bin
         self.workflows_dir = self.repo_path / ".github" / "workflows"
+        self.max_workers = max(1, max_workers or _load_max_workers())
+        self.timeout = timeout
+        self._project_info: Optional[tuple] = None
+        self._workflow_cache: Optional[Dict[str, Dict[str, str]]] = None
+        self._file_cache: Dict[Path, tuple] = {}
+        self.created_files: Set[Path] = set()
         
     def detect_project_info(self) -> Dict[str, any]:
+        """Detect project information, reusing the last result while the tree looks unchanged."""
+        key = tuple(_mtime_ns(path) for path in (self.repo_path, self.workflows_dir))
+        if self._project_info is None or self._project_info[0] != key:
+            self._project_info = (key, self._detect_project_info())
+        return copy.deepcopy(self._project_info[1])
+    
+    def _detect_project_info(self) -> Dict[str, any]:
         """Detect comprehensive project information."""
         info = {
             "type": "generic",
@@ -36,26 +217,30 @@ class GitHubActionsAgent:
             "project_files": []
         }
         
-        # Language detection
-        project_indicators = {
-            'python': ['requirements.txt', 'pyproject.toml', 'setup.py', 'Pipfile', '*.py'],
-            'node': ['package.json', 'yarn.lock', 'pnpm-lock.yaml'],
-            'rust': ['Cargo.toml'],
-            'go': ['go.mod', 'go.sum'],
-            'java': ['pom.xml', 'build.gradle', 'build.gradle.kts'],
-            'php': ['composer.json'],
-            'ruby': ['Gemfile', 'Rakefile'],
-            'dotnet': ['*.csproj', '*.sln'],
-            'docker': ['Dockerfile', 'docker-compose.yml']
-        }
+        # Language detection: classify the repository root listing in one pass,
+        # keeping the files of each language's highest-priority indicator
+        found: Dict[str, List] = {}
+        root_has_tests = False
+        try:
+            with os.scandir(self.repo_path) as entries:
+                for entry in entries:
+                    match = (EXACT_INDICATORS.get(entry.name)
+                             or SUFFIX_INDICATORS.get(os.path.splitext(entry.name)[1]))
+                    if match:
+                        found.setdefault(match[0], []).append((match[1], entry.name))
+                    if not root_has_tests:
+                        root_has_tests = (entry.name in TEST_DIR_NAMES or
+                                          (entry.name.startswith("test") and
+                                           entry.name.endswith(TEST_FILE_SUFFIXES)))
+        except OSError:
+            pass
         
-        for lang, indicators in project_indicators.items():
-            for indicator in indicators:
-                if list(self.repo_path.glob(indicator)):
-                    info["languages"].append(lang)
-                    # Add found files for context
-                    info["project_files"].extend([str(f) for f in self.repo_path.glob(indicator)])
-                    break
+        for lang in PROJECT_INDICATORS:
+            if lang in found:
+                best_rank = min(rank for rank, _ in found[lang])
+                info["languages"].append(lang)
+                info["project_files"].extend(
+                    str(self.repo_path / name) for rank, name in sorted(found[lang]) if rank == best_rank)
         
         # Primary type
         if 'python' in info["languages"]:
@@ -65,62 +250,133 @@ class GitHubActionsAgent:
         elif info["languages"]:
             info["type"] = info["languages"][0]
         
-        # Test detection
-        test_patterns = ['**/test*.py', '**/test*.js', '**/test*.go', '**/test*.rs', 
-                        '**/tests/**', '**/spec/**', '**/__tests__/**']
-        for pattern in test_patterns:
-            if list(self.repo_path.glob(pattern)):
-                info["has_tests"] = True
-                break
+        # Test detection (the root listing above already settles the common layouts)
+        info["has_tests"] = root_has_tests
+        if not root_has_tests:
+            # Only existence matters, so stop each walk at its first match
+            info["has_tests"] = any(
+                next(self.repo_path.glob(pattern), None) is not None
+                for pattern in TEST_PATTERNS
+            )
         
         # Workflow detection
         info["has_workflows"] = self.has_workflows()
         
         return info
     
+    def _read_text(self, path: Path) -> str:
+        """Read a UTF-8 file, reusing the previous read while its mtime and size are unchanged."""
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+        cached = self._file_cache.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+        with os.fdopen(os.open(path, os.O_RDONLY), 'rb') as f:
+            text = f.read().decode("utf-8")
+        self._file_cache[path] = (key, text)
+        return text
+    
     def has_workflows(self) -> bool:
         """Check if repository has GitHub Actions workflows."""
-        if not self.workflows_dir.exists():
+        try:
+            with os.scandir(self.workflows_dir) as entries:
+                return any(_is_workflow_entry(entry) for entry in entries)
+        except OSError:
             return False
-        return any(self.workflows_dir.glob("*.yml")) or any(self.workflows_dir.glob("*.yaml"))
     
     def get_workflow_files(self) -> List[Path]:
         """Get all workflow files."""
-        if not self.workflows_dir.exists():
+        try:
+            with os.scandir(self.workflows_dir) as entries:
+                return [Path(entry.path) for entry in entries if _is_workflow_entry(entry)]
+        except OSError:
             return []
-        workflows = []
-        workflows.extend(self.workflows_dir.glob("*.yml"))
-        workflows.extend(self.workflows_dir.glob("*.yaml"))
-        return workflows
-    
-    def run_claude_subprocess(self, prompt: str, task_name: str = "") -> str:
-        """Run Claude CLI in subprocess with optimized prompt."""
-        cmd = ["claude", "--print", prompt]
+    
+    def run_claude_subprocess(self, prompt: str, task_name: str = "",
+                              timeout: Optional[int] = None,
+                              on_block: Optional[Callable[[str, str], None]] = None) -> str:
+        """Run Claude CLI in subprocess with optimized prompt (blocking)."""
+        return asyncio.run(self._run_claude_async(prompt, task_name, timeout, on_block))
+    
+    async def _run_claude_async(self, prompt: str, task_name: str = "",
+                                timeout: Optional[int] = None,
+                                on_block: Optional[Callable[[str, str], None]] = None) -> str:
+        """Run Claude CLI in subprocess without tying up a thread.
+        
+        Output is read line by line; when on_block is given it is called with
+        (file name, yaml) for each '### FILE:' block as soon as its fence closes.
+        
+        Each call gets a fresh `claude --print` process on purpose: a long-lived
+        streaming session would carry one workflow's conversation into the next.
+        CLI start-up is amortised by process_workflows_batched instead.
+        """
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                self.claude_bin, "--print", prompt,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                cwd=self.repo_path)
+        except Exception as e:
+            print(f"❌ Error running Claude for {task_name}: {e}")
+            return ""
+        
+        lines = []
+        tokenizer = _FenceTokenizer()
+        
+        async def read_output():
+            async for line in proc.stdout:
+                line = line.decode(errors="replace")
+                lines.append(line)
+                block = tokenizer.feed(line)
+                if block and on_block:
+                    on_block(*block)
+        
+        stderr_task = asyncio.ensure_future(proc.stderr.read())
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, 
-                                  cwd=self.repo_path, timeout=60)
-            if result.returncode != 0:
-                print(f"❌ Claude error for {task_name}: {result.stderr}")
-                return ""
-            return result.stdout
-        except subprocess.TimeoutExpired:
+            await asyncio.wait_for(read_output(), timeout or self.timeout)
+            stderr = await stderr_task
+            await proc.wait()
+        except asyncio.TimeoutError:
+            await self._stop_claude(proc, stderr_task)
             print(f"⏰ Claude timeout for {task_name}")
             return ""
         except Exception as e:
+            # Over-long lines, callback errors, ...: fail this task, not the whole gather
+            await self._stop_claude(proc, stderr_task)
             print(f"❌ Error running Claude for {task_name}: {e}")
             return ""
+        
+        if proc.returncode != 0:
+            print(f"❌ Claude error for {task_name}: {stderr.decode(errors='replace')}")
+            return ""
+        return "".join(lines)
+    
+    @staticmethod
+    async def _stop_claude(proc, stderr_task):
+        """Cancel the stderr reader and kill a Claude process that is being abandoned."""
+        stderr_task.cancel()
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+        await proc.wait()
     
     def extract_yaml_content(self, response: str) -> str:
         """Extract YAML from Claude response."""
-        if "```yaml" in response:
-            return response.split("```yaml")[1].split("```")[0].strip()
-        elif "```" in response:
-            parts = response.split("```")
-            for i, part in enumerate(parts):
-                if "name:" in part and ("on:" in part or "jobs:" in part):
-                    return part.strip()
+        match = _YAML_FENCE_RE.search(response)
+        if match:
+            return match.group(1).strip()
+        for match in _FENCE_RE.finditer(response):
+            block = match.group(1)
+            if "name:" in block and ("on:" in block or "jobs:" in block):
+                return block.strip()
         return response.strip()
     
+    def extract_all_yaml(self, response: str) -> Dict[str, str]:
+        """Extract every '### FILE: name' YAML block from a batched response in one pass."""
+        return {match.group(1): match.group(2).strip()
+                for match in _FILE_FENCE_RE.finditer(response)}
+    
     def create_workflow_for_project(self, project_info: Dict) -> bool:
         """Create workflows based on project information."""
         if project_info["has_workflows"]:
@@ -130,24 +386,33 @@ class GitHubActionsAgent:
         print(f"🚀 Creating workflows for {project_info['type']} project...")
         self.workflows_dir.mkdir(parents=True, exist_ok=True)
         
-        # Create CI workflow
-        ci_prompt = self._get_ci_prompt(project_info)
-        ci_response = self.run_claude_subprocess(ci_prompt, "CI workflow")
+        return asyncio.run(self._create_all(project_info))
+    
+    async def _create_all(self, project_info: Dict) -> bool:
+        """Generate the CI workflow and, if needed, the security workflow concurrently."""
+        tasks = [self._run_claude_async(self._get_ci_prompt(project_info), "CI workflow")]
         
-        if ci_response:
-            ci_content = self.extract_yaml_content(ci_response)
-            ci_file = self.workflows_dir / "ci.yml"
-            with open(ci_file, 'w') as f:
-                f.write(ci_content)
-            print(f"✅ Created {ci_file.name}")
-            
-            # Create security workflow if this is a significant project
-            if project_info["has_tests"]:
-                self._create_security_workflow(project_info)
-            
-            return True
+        # Create security workflow if this is a significant project
+        if project_info["has_tests"]:
+            tasks.append(self._run_claude_async(
+                self._get_security_prompt(project_info), "Security workflow"))
+        
+        ci_response, *security_response = await asyncio.gather(*tasks)
+        if not ci_response:
+            return False
         
-        return False
+        self._write_created_workflow("ci.yml", ci_response)
+        if security_response and security_response[0]:
+            self._write_created_workflow("security.yml", security_response[0])
+        return True
+    
+    def _write_created_workflow(self, file_name: str, response: str):
+        """Write the YAML from a creation response into the workflows directory."""
+        workflow_file = self.workflows_dir / file_name
+        with open(workflow_file, 'w', encoding="utf-8", newline="\n") as f:
+            f.write(self.extract_yaml_content(response))
+        self.created_files.add(workflow_file)
+        print(f"✅ Created {workflow_file.name}")
     
     def _get_ci_prompt(self, project_info: Dict) -> str:
         """Generate CI workflow prompt based on project info."""
@@ -204,29 +469,20 @@ class GitHubActionsAgent:
             - Use latest action versions
             Output only clean YAML content."""
     
-    def _create_security_workflow(self, project_info: Dict):
-        """Create security scanning workflow."""
-        security_prompt = f"""Create a GitHub Actions security workflow for a {project_info['type']} project.
+    def _get_security_prompt(self, project_info: Dict) -> str:
+        """Generate security scanning workflow prompt."""
+        return f"""Create a GitHub Actions security workflow for a {project_info['type']} project.
         Include:
         - Dependency vulnerability scanning
         - SAST security analysis
         - Weekly schedule + manual trigger
         - Use latest action versions
         Output only clean YAML content."""
-        
-        response = self.run_claude_subprocess(security_prompt, "Security workflow")
-        if response:
-            content = self.extract_yaml_content(response)
-            security_file = self.workflows_dir / "security.yml"
-            with open(security_file, 'w') as f:
-                f.write(content)
-            print(f"✅ Created {security_file.name}")
     
-    def improve_workflow_concurrent(self, workflow_file: Path) -> Dict:
+    async def improve_workflow_concurrent(self, workflow_file: Path) -> Dict:
         """Improve a single workflow file (for concurrent execution)."""
         try:
-            with open(workflow_file, 'r') as f:
-                current_content = f.read()
+            current_content = self._read_text(workflow_file)
             
             prompt = f"""Improve this GitHub Actions workflow with modern best practices:
             
@@ -245,11 +501,11 @@ class GitHubActionsAgent:
             
             Output only the improved YAML content."""
             
-            response = self.run_claude_subprocess(prompt, f"improve {workflow_file.name}")
+            response = await self._run_claude_async(prompt, f"improve {workflow_file.name}")
             
             if response:
                 improved_content = self.extract_yaml_content(response)
-                with open(workflow_file, 'w') as f:
+                with open(workflow_file, 'w', encoding="utf-8", newline="\n") as f:
                     f.write(improved_content)
                 return {"status": "success", "file": workflow_file.name}
             else:
@@ -258,11 +514,10 @@ class GitHubActionsAgent:
         except Exception as e:
             return {"status": "error", "file": workflow_file.name, "error": str(e)}
     
-    def fix_workflow_concurrent(self, workflow_file: Path) -> Dict:
+    async def fix_workflow_concurrent(self, workflow_file: Path) -> Dict:
         """Fix a single workflow file (for concurrent execution)."""
         try:
-            with open(workflow_file, 'r') as f:
-                current_content = f.read()
+            current_content = self._read_text(workflow_file)
             
             prompt = f"""Analyze and fix common issues in this GitHub Actions workflow:
             
@@ -282,11 +537,11 @@ class GitHubActionsAgent:
             
             Output only the fixed YAML content."""
             
-            response = self.run_claude_subprocess(prompt, f"fix {workflow_file.name}")
+            response = await self._run_claude_async(prompt, f"fix {workflow_file.name}")
             
             if response:
                 fixed_content = self.extract_yaml_content(response)
-                with open(workflow_file, 'w') as f:
+                with open(workflow_file, 'w', encoding="utf-8", newline="\n") as f:
                     f.write(fixed_content)
                 return {"status": "success", "file": workflow_file.name}
             else:
@@ -295,38 +550,228 @@ class GitHubActionsAgent:
         except Exception as e:
             return {"status": "error", "file": workflow_file.name, "error": str(e)}
     
+    async def improve_and_fix_workflow_concurrent(self, workflow_file: Path) -> Dict:
+        """Fix and improve a single workflow file with one Claude call."""
+        try:
+            current_content = self._read_text(workflow_file)
+            
+            prompt = IMPROVE_AND_FIX_PROMPT % {
+                "content": current_content,
+                "instructions": BATCH_INSTRUCTIONS["improve_and_fix"]
+            }
+            response = await self._run_claude_async(prompt, f"improve+fix {workflow_file.name}")
+            
+            if response:
+                updated_content = self.extract_yaml_content(response)
+                with open(workflow_file, 'w', encoding="utf-8", newline="\n") as f:
+                    f.write(updated_content)
+                return {"status": "success", "file": workflow_file.name}
+            else:
+                return {"status": "failed", "file": workflow_file.name}
+                
+        except Exception as e:
+            return {"status": "error", "file": workflow_file.name, "error": str(e)}
+    
+    def _load_workflow_cache(self) -> Dict[str, Dict[str, str]]:
+        """Content digests of workflows Claude already processed, per operation."""
+        if self._workflow_cache is None:
+            try:
+                with open(WORKFLOW_CACHE_FILE, 'rb') as f:
+                    self._workflow_cache = _json_loads(f.read())
+            except (OSError, ValueError):
+                self._workflow_cache = {}
+        return self._workflow_cache
+    
+    def _save_workflow_cache(self):
+        """Persist the workflow cache atomically."""
+        try:
+            WORKFLOW_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = WORKFLOW_CACHE_FILE.with_suffix(".tmp")
+            with open(tmp_file, 'wb') as f:
+                f.write(_json_dumps(self._load_workflow_cache()))
+            os.replace(tmp_file, WORKFLOW_CACHE_FILE)
+        except OSError as e:
+            print(f"⚠️  Could not update workflow cache: {e}")
+    
+    def _workflow_digest(self, workflow_file: Path) -> Optional[str]:
+        """SHA-256 of the workflow's current content, or None if unreadable."""
+        try:
+            return hashlib.sha256(self._read_text(workflow_file).encode()).hexdigest()
+        except (OSError, ValueError):
+            return None
+    
+    def _batch_prompt(self, workflows: Dict[str, str], operation: str) -> str:
+        """Build a single prompt covering every workflow file."""
+        sections = [
+            f"### FILE: {name}\n```yaml\n{content}\n```"
+            for name, content in workflows.items()
+        ]
+        return BATCH_PROMPT % {
+            "count": len(workflows),
+            "instructions": BATCH_INSTRUCTIONS[operation],
+            "files": "\n\n".join(sections)
+        }
+    
+    def _parse_batched_response(self, response: str, expected: List[str]) -> Optional[Dict[str, str]]:
+        """Parse the {filename: yaml} map from a batched response, or None if unusable."""
+        match = _JSON_FENCE_RE.search(response)
+        try:
+            data = json.loads(match.group(1) if match else response)
+        except ValueError:
+            # Claude sometimes answers in the same per-file layout as the prompt
+            data = self.extract_all_yaml(response)
+            if not data:
+                return None
+        if not isinstance(data, dict):
+            return None
+        return {
+            name: data[name].strip() for name in expected
+            if isinstance(data.get(name), str) and data[name].strip()
+        }
+    
+    def process_workflows_batched(self, workflow_files: List[Path],
+                                  operation: str = "improve") -> List[Dict]:
+        """Process all workflows with one Claude call, falling back to per-file calls."""
+        # Skip workflows unchanged since Claude last processed them for this operation,
+        # stubs too small to improve, and group identical files so each is sent once
+        cache = self._load_workflow_cache()
+        skipped = []
+        groups: Dict[str, List[Path]] = {}
+        for workflow_file in workflow_files:
+            digest = self._workflow_digest(workflow_file)
+            if digest and cache.get(str(workflow_file), {}).get(operation) == digest:
+                print(f"⏭️  {workflow_file.name}: unchanged since last {operation}")
+                skipped.append({"status": "skipped", "file": workflow_file.name})
+                continue
+            try:
+                content = self._read_text(workflow_file)
+            except (OSError, ValueError):
+                # Let the processing path report the read error
+                groups[str(workflow_file)] = [workflow_file]
+                continue
+            if len(content.strip()) < MIN_WORKFLOW_SIZE:
+                print(f"⏭️  {workflow_file.name}: too small to {operation}")
+                skipped.append({"status": "skipped", "file": workflow_file.name})
+                continue
+            canonical = "\n".join(line.rstrip() for line in content.strip().splitlines())
+            groups.setdefault(hashlib.sha256(canonical.encode()).hexdigest(), []).append(workflow_file)
+        
+        pending = [paths[0] for paths in groups.values()]
+        results = self._process_workflows_batched(pending, operation)
+        
+        # Apply each representative's outcome to its duplicates
+        duplicates = {paths[0].name: paths for paths in groups.values() if len(paths) > 1}
+        for result in list(results):
+            paths = duplicates.get(result["file"], [])
+            for duplicate in paths[1:]:
+                if result["status"] == "success":
+                    try:
+                        content = self._read_text(paths[0])
+                    except (OSError, ValueError) as e:
+                        results.append({"status": "error", "file": duplicate.name, "error": str(e)})
+                        continue
+                    results.append(self._write_workflow_result(duplicate, content))
+                else:
+                    results.append(dict(result, file=duplicate.name))
+        
+        by_name = {workflow_file.name: workflow_file
+                   for paths in groups.values() for workflow_file in paths}
+        succeeded = [by_name[r["file"]] for r in results
+                     if r["status"] == "success" and r["file"] in by_name]
+        for workflow_file in succeeded:
+            digest = self._workflow_digest(workflow_file)
+            if digest:
+                cache.setdefault(str(workflow_file), {})[operation] = digest
+        if succeeded:
+            self._save_workflow_cache()
+        return skipped + results
+    
+    def _process_workflows_batched(self, workflow_files: List[Path], operation: str) -> List[Dict]:
+        """Send workflows to Claude in one batched request."""
+        if len(workflow_files) < 2:
+            return self.process_workflows_concurrently(workflow_files, operation)
+        
+        print(f"🔄 Processing {len(workflow_files)} workflows in one batched request...")
+        
+        workflows = {}
+        results = []
+        for workflow_file in workflow_files:
+            try:
+                workflows[workflow_file.name] = self._read_text(workflow_file)
+            except Exception as e:
+                results.append({"status": "error", "file": workflow_file.name, "error": str(e)})
+        
+        by_name = {f.name: f for f in workflow_files if f.name in workflows}
+        written: Dict[str, Dict] = {}
+        
+        def write_block(name: str, content: str):
+            if name in by_name and name not in written and content:
+                written[name] = self._write_workflow_result(by_name[name], content)
+        
+        # Files are written as their blocks stream in, while Claude is still generating
+        response = self.run_claude_subprocess(
+            self._batch_prompt(workflows, operation), f"batch {operation}",
+            timeout=min(self.timeout * len(workflows), max(BATCH_TIMEOUT_CAP, self.timeout)),
+            on_block=write_block
+        )
+        pending = [name for name in by_name if name not in written]
+        if response and pending:
+            # Claude may still answer with a JSON map instead of per-file blocks
+            for name, content in (self._parse_batched_response(response, pending) or {}).items():
+                write_block(name, content)
+        results.extend(written.values())
+        
+        remaining = [by_name[name] for name in by_name if name not in written]
+        if remaining:
+            print(f"⚠️  {len(remaining)} workflows missing from batched response, processing individually")
+            results.extend(self.process_workflows_concurrently(remaining, operation))
+        return results
+    
+    def _write_workflow_result(self, workflow_file: Path, content: str) -> Dict:
+        """Write Claude's output for one workflow and report it."""
+        try:
+            with open(workflow_file, 'w', encoding="utf-8", newline="\n") as f:
+                f.write(content)
+            result = {"status": "success", "file": workflow_file.name}
+        except Exception as e:
+            result = {"status": "error", "file": workflow_file.name, "error": str(e)}
+        if result["status"] == "success":
+            print(f"✅ {result['file']}")
+        else:
+            print(f"❌ {result['file']}: {result.get('error', 'Failed')}")
+        return result
+    
     def process_workflows_concurrently(self, workflow_files: List[Path], 
                                      operation: str = "improve") -> List[Dict]:
-        """Process multiple workflows concurrently using thread pool."""
+        """Process multiple workflows concurrently on an asyncio event loop."""
         if not workflow_files:
             return []
         
         print(f"🔄 Processing {len(workflow_files)} workflows concurrently...")
-        
+        return asyncio.run(self._process_async(workflow_files, operation))
+    
+    async def _process_async(self, workflow_files: List[Path], operation: str) -> List[Dict]:
+        """Run one Claude call per workflow with at most max_workers in flight."""
         # Choose operation function
-        operation_func = (self.improve_workflow_concurrent if operation == "improve" 
-                         else self.fix_workflow_concurrent)
-        
-        # Use ThreadPoolExecutor for concurrent processing
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-            # Submit all tasks
-            future_to_workflow = {
-                executor.submit(operation_func, workflow): workflow 
-                for workflow in workflow_files
-            }
+        operation_func = {
+            "improve": self.improve_workflow_concurrent,
+            "fix": self.fix_workflow_concurrent,
+            "improve_and_fix": self.improve_and_fix_workflow_concurrent
+        }[operation]
+        semaphore = asyncio.Semaphore(self.max_workers)
+        
+        async def process(workflow: Path) -> Dict:
+            async with semaphore:
+                result = await operation_func(workflow)
             
-            results = []
-            for future in concurrent.futures.as_completed(future_to_workflow):
-                result = future.result()
-                results.append(result)
-                
-                # Print real-time status
-                if result["status"] == "success":
-                    print(f"✅ {result['file']}")
-                else:
-                    print(f"❌ {result['file']}: {result.get('error', 'Failed')}")
+            # Print real-time status
+            if result["status"] == "success":
+                print(f"✅ {result['file']}")
+            else:
+                print(f"❌ {result['file']}: {result.get('error', 'Failed')}")
+            return result
         
-        return results
+        return list(await asyncio.gather(*(process(workflow) for workflow in workflow_files)))
     
     def run_full_analysis(self) -> Dict:
         """Run complete GitHub Actions analysis and improvement."""
@@ -353,19 +798,15 @@ class GitHubActionsAgent:
         if not project_info["has_workflows"]:
             results["created_workflows"] = self.create_workflow_for_project(project_info)
         
-        # Get current workflows
-        workflow_files = self.get_workflow_files()
+        # Get current workflows, leaving out the ones Claude just generated
+        workflow_files = [w for w in self.get_workflow_files() if w not in self.created_files]
         
         if workflow_files:
-            # Improve workflows concurrently
-            print("\n🔧 Improving existing workflows...")
-            improve_results = self.process_workflows_concurrently(workflow_files, "improve")
-            results["improved_workflows"] = improve_results
-            
-            # Fix any remaining issues concurrently
-            print("\n🔨 Fixing workflow issues...")
-            fix_results = self.process_workflows_concurrently(workflow_files, "fix")
-            results["fixed_workflows"] = fix_results
+            # Fix and improve in one pass; both rule sets go into the same prompt
+            print("\n🔧 Fixing and improving existing workflows...")
+            fused_results = self.process_workflows_batched(workflow_files, "improve_and_fix")
+            results["improved_workflows"] = fused_results
+            results["fixed_workflows"] = fused_results
         
         # Summary
         print(f"\n🎉 GitHub Actions improvement complete!")
@@ -383,6 +824,11 @@ def main():
     parser.add_argument("--mode", choices=["create", "improve", "fix", "full"], 
                        default="full", help="Operation mode")
     parser.add_argument("--repo-path", default=".", help="Repository path")
+    parser.add_argument("--max-concurrency", type=int, default=None,
+                       help="Maximum concurrent Claude calls (default: api_settings.default_workers "
+                            f"from config.json, else {DEFAULT_MAX_WORKERS})")
+    parser.add_argument("--timeout", type=int, default=CLAUDE_TIMEOUT,
+                       help=f"Seconds allowed per Claude call (default: {CLAUDE_TIMEOUT})")
     
     args = parser.parse_args()
     
@@ -393,13 +839,13 @@ def main():
         sys.exit(1)
     
     # Verify Claude CLI
-    try:
-        subprocess.run(["claude", "--help"], capture_output=True, check=True)
-    except:
+    claude_bin = _find_claude_cli()
+    if not claude_bin:
         print("❌ Claude CLI not available")
         sys.exit(1)
     
-    agent = GitHubActionsAgent(args.repo_path)
+    agent = GitHubActionsAgent(args.repo_path, claude_bin=claude_bin,
+                               max_workers=args.max_concurrency, timeout=args.timeout)
     
     if args.mode == "full":
         agent.run_full_analysis()
@@ -408,10 +854,10 @@ def main():
         agent.create_workflow_for_project(project_info)
     elif args.mode == "improve":
         workflows = agent.get_workflow_files()
-        agent.process_workflows_concurrently(workflows, "improve")
+        agent.process_workflows_batched(workflows, "improve")
     elif args.mode == "fix":
         workflows = agent.get_workflow_files()
-        agent.process_workflows_concurrently(workflows, "fix")
+        agent.process_workflows_batched(workflows, "fix")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
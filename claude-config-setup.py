@@ -6,9 +6,36 @@ Sets up secure configuration directory following Claude best practices
 
 import os
 import json
+import tempfile
 from pathlib import Path
 from typing import Dict, Any
 
+try:
+    import orjson  # optional: faster serialization when installed
+except ImportError:
+    orjson = None
+
+def _dumps(obj: Any) -> str:
+    """Serialize obj as compact JSON, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(',', ':'))
+
+def _atomic_write(path: Path, data: str, mode: int = 0o600):
+    """Write data to path via a temp file and os.replace so readers never see a partial file"""
+    with tempfile.NamedTemporaryFile('w', encoding="utf-8", newline="\n",
+                                     dir=path.parent, prefix=f".{path.name}.",
+                                     delete=False) as f:
+        try:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            os.chmod(f.name, mode)
+        except BaseException:
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+
 def setup_claude_config():
     """Set up Claude configuration directory structure"""
     
@@ -30,13 +57,11 @@ def setup_claude_config():
     # Create .env file for environment variables
     env_file = claude_dir / ".env"
     if not env_file.exists():
-        with open(env_file, 'w') as f:
-            f.write("# Claude Environment Variables\n")
-            f.write("# This file is automatically loaded by Claude\n\n")
-            f.write("# GitHub Token (uncomment and set your token)\n")
-            f.write("# GITHUB_TOKEN=your_token_here\n\n")
-        
-        os.chmod(env_file, 0o600)
+        _atomic_write(env_file,
+                      "# Claude Environment Variables\n"
+                      "# This file is automatically loaded by Claude\n\n"
+                      "# GitHub Token (uncomment and set your token)\n"
+                      "# GITHUB_TOKEN=your_token_here\n\n")
         print(f"✅ Created secure .env file: {env_file}")
     
     # Create app-specific config
@@ -61,30 +86,25 @@ def setup_claude_config():
     }
     
     if not config_file.exists():
-        with open(config_file, 'w') as f:
-            json.dump(default_config, f, indent=2)
-        
-        os.chmod(config_file, 0o600)
+        _atomic_write(config_file, _dumps(default_config))
         print(f"✅ Created app configuration: {config_file}")
     
     # Create gitignore for the directory
     gitignore_file = claude_dir / ".gitignore"
     if not gitignore_file.exists():
-        with open(gitignore_file, 'w') as f:
-            f.write("# Claude Configuration Security\n")
-            f.write("*.enc\n")
-            f.write("*.key\n")
-            f.write(".env\n")
-            f.write("secrets/\n")
-            f.write("tokens/\n")
-        
+        _atomic_write(gitignore_file,
+                      "# Claude Configuration Security\n"
+                      "*.enc\n"
+                      "*.key\n"
+                      ".env\n"
+                      "secrets/\n"
+                      "tokens/\n", mode=0o644)
         print(f"✅ Created security .gitignore: {gitignore_file}")
     
     # Create README for the configuration
     readme_file = app_dir / "README.md"
     if not readme_file.exists():
-        with open(readme_file, 'w') as f:
-            f.write("""# Claude GitHub Actions Improver Configuration
+        _atomic_write(readme_file, """# Claude GitHub Actions Improver Configuration
 
 This directory contains secure configuration for the GitHub Actions Improver.
 
@@ -103,7 +123,7 @@ This directory contains secure configuration for the GitHub Actions Improver.
 - Claude automatically loads `.env` from `~/.claude/.env`
 - App-specific settings stored in this directory
 - Tokens retrieved automatically by the system
-""")
+""", mode=0o644)
         print(f"✅ Created documentation: {readme_file}")
     
     print(f"\n🎉 Claude configuration setup complete!")
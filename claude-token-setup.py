@@ -7,17 +7,65 @@ Interactive GitHub token setup optimized for Claude's workflow
 import os
 import sys
 import json
+import http.client
+import stat
 import subprocess
+import time
 import webbrowser
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+
+# Timeout (seconds) for quick local commands such as `gh --version` and `security`
+GH_QUICK_TIMEOUT = 10
+GITHUB_API_HOST = "api.github.com"
+GITHUB_API_TIMEOUT = 10
+
+# Accepted GitHub token prefixes (classic, OAuth, user/server/refresh, fine-grained PAT)
+VALID_TOKEN_PREFIXES = ('ghp_', 'gho_', 'ghu_', 'ghs_', 'ghr_', 'github_pat_')
+TOKEN_LENGTH_RANGE = (16, 255)
+
+def _run(cmd: List[str], timeout: float = GH_QUICK_TIMEOUT, retries: int = 2,
+         **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run with a timeout, retrying timed-out commands with exponential backoff"""
+    for attempt in range(retries + 1):
+        try:
+            return subprocess.run(cmd, timeout=timeout, **kwargs)
+        except subprocess.TimeoutExpired:
+            if attempt == retries:
+                raise
+            time.sleep(2 ** attempt)
+
+# show_status_report templates, filled from check_current_setup()
+STATUS_REPORT_CONFIGURED = (
+    "🔍 **Current GitHub API Status:**\n\n"
+    "✅ **Authentication**: Configured\n"
+    "📊 **Token Source**: {token_source}\n"
+    "⚡ **Rate Limit**: {rate_limit:,} requests/hour\n"
+    "🚀 **Max Workers**: {max_workers} concurrent jobs\n"
+    "🎯 **Capacity**: Can handle 50+ failing jobs simultaneously\n\n"
+    "✅ **Your setup is optimized!** No changes needed.\n"
+)
+STATUS_REPORT_UNCONFIGURED = (
+    "🔍 **Current GitHub API Status:**\n\n"
+    "❌ **Authentication**: Not configured\n"
+    "📊 **Rate Limit**: {rate_limit} requests/hour (severely limited)\n"
+    "🐌 **Max Workers**: {max_workers} concurrent jobs\n"
+    "⚠️ **Capacity**: Can only handle ~5 jobs before hitting limits\n\n"
+    "💡 **Recommendation**: Set up GitHub token for 83x better performance!\n"
+)
 
 class ClaudeTokenSetup:
     """Streamlined token setup for Claude CLI integration"""
     
+    # Keep-alive connection shared by every API check in this process
+    _api_conn: Optional[http.client.HTTPSConnection] = None
+    
     def __init__(self):
         self.claude_dir = Path.home() / ".claude"
         self.app_dir = self.claude_dir / "github-actions-improver"
+        # Probed setup status per (GITHUB_TOKEN, GH_TOKEN) environment pair;
+        # cleared whenever this tool stores a token somewhere else
+        self._setup_cache: Dict[Tuple[Optional[str], Optional[str]], Dict[str, any]] = {}
         
     def setup_directories(self):
         """Set up Claude directories with secure permissions"""
@@ -30,6 +78,16 @@ class ClaudeTokenSetup:
     
     def check_current_setup(self) -> Dict[str, any]:
         """Check current token configuration"""
+        # Keyed on the env tokens so setting either one is picked up immediately
+        key = (os.environ.get("GITHUB_TOKEN"), os.environ.get("GH_TOKEN"))
+        status = self._setup_cache.get(key)
+        if status is None:
+            status = self._setup_cache[key] = self._probe_current_setup(*key)
+        return dict(status)
+    
+    def _probe_current_setup(self, env_github_token: Optional[str],
+                             env_gh_token: Optional[str]) -> Dict[str, any]:
+        """Probe token sources (the gh CLI probe spawns a process)"""
         status = {
             "has_token": False,
             "token_source": None,
@@ -39,14 +97,14 @@ class ClaudeTokenSetup:
         
         # Check various token sources
         token_sources = [
-            ("Environment GITHUB_TOKEN", os.environ.get("GITHUB_TOKEN")),
-            ("Environment GH_TOKEN", os.environ.get("GH_TOKEN")),
-            ("Claude .env", self._check_claude_env()),
-            ("GitHub CLI", self._check_gh_cli())
+            ("Environment GITHUB_TOKEN", lambda: env_github_token),
+            ("Environment GH_TOKEN", lambda: env_gh_token),
+            ("Claude .env", self._check_claude_env),
+            ("GitHub CLI", self._check_gh_cli)
         ]
         
-        for source, token in token_sources:
-            if token:
+        for source, get_token in token_sources:
+            if get_token():
                 status["has_token"] = True
                 status["token_source"] = source
                 status["rate_limit"] = 5000
@@ -58,16 +116,31 @@ class ClaudeTokenSetup:
     def _check_claude_env(self) -> Optional[str]:
         """Check Claude .env file for token"""
         env_file = self.claude_dir / ".env"
-        if env_file.exists():
-            try:
-                with open(env_file, 'r') as f:
-                    for line in f:
-                        if line.startswith('GITHUB_TOKEN='):
-                            return line.split('=', 1)[1].strip()
-            except:
-                pass
+        try:
+            # Opening a FIFO (e.g. a secrets-manager mount) would block; only read regular files
+            if not stat.S_ISREG(os.stat(env_file).st_mode):
+                return None
+            with open(env_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.startswith('GITHUB_TOKEN='):
+                        return self._resolve_token_value(line.split('=', 1)[1].strip())
+        except (OSError, UnicodeDecodeError):
+            pass
         return None
     
+    def _resolve_token_value(self, value: str) -> Optional[str]:
+        """Resolve a .env token value; 'file://<path>' reads the token from that file"""
+        if not value.startswith('file://'):
+            return value or None
+        token_file = Path(value[len('file://'):]).expanduser()
+        try:
+            if not stat.S_ISREG(os.stat(token_file).st_mode):
+                return None
+            with open(token_file, 'r', encoding='utf-8') as f:
+                return f.readline().strip() or None
+        except (OSError, UnicodeDecodeError):
+            return None
+    
     def _check_gh_cli(self) -> Optional[str]:
         """Check GitHub CLI for token"""
         try:
@@ -79,31 +152,17 @@ class ClaudeTokenSetup:
             )
             if result.returncode == 0:
                 return result.stdout.strip()
-        except:
+        except (OSError, subprocess.SubprocessError):
             pass
         return None
     
-    def show_status_report(self) -> str:
+    def show_status_report(self, status: Optional[Dict[str, any]] = None) -> str:
         """Generate status report for Claude to display"""
-        status = self.check_current_setup()
-        
-        report = "🔍 **Current GitHub API Status:**\n\n"
-        
-        if status["has_token"]:
-            report += f"✅ **Authentication**: Configured\n"
-            report += f"📊 **Token Source**: {status['token_source']}\n"
-            report += f"⚡ **Rate Limit**: {status['rate_limit']:,} requests/hour\n"
-            report += f"🚀 **Max Workers**: {status['max_workers']} concurrent jobs\n"
-            report += f"🎯 **Capacity**: Can handle 50+ failing jobs simultaneously\n\n"
-            report += f"✅ **Your setup is optimized!** No changes needed.\n"
-        else:
-            report += f"❌ **Authentication**: Not configured\n"
-            report += f"📊 **Rate Limit**: {status['rate_limit']} requests/hour (severely limited)\n"
-            report += f"🐌 **Max Workers**: {status['max_workers']} concurrent jobs\n"
-            report += f"⚠️ **Capacity**: Can only handle ~5 jobs before hitting limits\n\n"
-            report += f"💡 **Recommendation**: Set up GitHub token for 83x better performance!\n"
+        if status is None:
+            status = self.check_current_setup()
         
-        return report
+        template = STATUS_REPORT_CONFIGURED if status["has_token"] else STATUS_REPORT_UNCONFIGURED
+        return template.format_map(status)
     
     def get_setup_options(self) -> str:
         """Get setup options for Claude to present"""
@@ -140,9 +199,8 @@ Which option would you prefer? I can guide you through any of these approaches.
         
         # Check if gh CLI is installed
         try:
-            subprocess.run(["gh", "--version"], 
-                         capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+            _run(["gh", "--version"], capture_output=True, check=True)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError):
             result["message"] = """
 ❌ **GitHub CLI not installed**
 
@@ -231,7 +289,7 @@ I'll open GitHub's token creation page for you with the recommended settings.
         try:
             webbrowser.open(result["token_url"])
             result["message"] += "\n✅ **Browser opened successfully**"
-        except:
+        except (webbrowser.Error, OSError):
             result["message"] += f"\n📋 **Manual**: Open this URL: {result['token_url']}"
         
         result["next_steps"] = [
@@ -251,7 +309,8 @@ I'll open GitHub's token creation page for you with the recommended settings.
         }
         
         # Validate token format
-        if not token or not token.startswith(('ghp_', 'gho_', 'ghu_', 'ghs_', 'ghr_')):
+        min_len, max_len = TOKEN_LENGTH_RANGE
+        if not min_len <= len(token or "") <= max_len or not token.startswith(VALID_TOKEN_PREFIXES):
             result["message"] = "❌ Invalid token format. Please check your token."
             return result
         
@@ -303,19 +362,20 @@ Please try manual setup:
     
     def _store_in_keychain(self, token: str) -> bool:
         """Store in system keychain (macOS)"""
-        if os.uname().sysname.lower() != "darwin":
+        if sys.platform != "darwin":
             return False
-            
+        
+        self._setup_cache.clear()
         try:
             # Delete existing
-            subprocess.run([
+            _run([
                 "security", "delete-generic-password",
                 "-s", "claude-github-actions",
                 "-a", "github-token"
             ], capture_output=True)
             
             # Add new
-            result = subprocess.run([
+            result = _run([
                 "security", "add-generic-password",
                 "-s", "claude-github-actions",
                 "-a", "github-token", 
@@ -324,55 +384,108 @@ Please try manual setup:
             ], capture_output=True)
             
             return result.returncode == 0
-        except:
+        except (OSError, subprocess.SubprocessError):
             return False
     
     def _store_in_claude_env(self, token: str) -> bool:
         """Store in Claude .env file"""
+        self._setup_cache.clear()
         try:
             self.setup_directories()
             env_file = self.claude_dir / ".env"
             
-            # Read existing content
-            existing_content = ""
-            if env_file.exists():
-                with open(env_file, 'r') as f:
-                    existing_content = f.read()
-            
-            # Update or add token
-            if "GITHUB_TOKEN=" in existing_content:
-                lines = []
-                for line in existing_content.split('\n'):
-                    if line.startswith('GITHUB_TOKEN='):
-                        lines.append(f'GITHUB_TOKEN={token}')
-                    else:
-                        lines.append(line)
-                new_content = '\n'.join(lines)
-            else:
-                new_content = existing_content
-                if not new_content.endswith('\n') and new_content:
-                    new_content += '\n'
-                new_content += f'\n# GitHub Token for Actions Improver\nGITHUB_TOKEN={token}\n'
+            if env_file.exists() and not env_file.is_file():
+                return False  # not a regular file we can safely rewrite
             
-            # Write with secure permissions
-            with open(env_file, 'w') as f:
-                f.write(new_content)
+            # A 'file://' entry points at an external secret; update that file
+            # rather than replacing the reference with the plaintext token
+            token_file = self._claude_env_token_file(env_file)
+            if token_file is not None:
+                return self._store_in_token_file(token_file, token)
             
-            os.chmod(env_file, 0o600)
+            # Stream existing content into a temp file in one pass, keyed on the
+            # exact variable name: the first GITHUB_TOKEN entry is replaced, later
+            # duplicates dropped, and comments and other keys kept in order
+            tmp_file = env_file.with_name('.env.tmp')
+            replaced = False
+            last_line = ""
+            # Owner-only from creation: the file holds the token before any chmod could run
+            tmp_file.unlink(missing_ok=True)
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            try:
+                with open(fd, 'w', encoding='utf-8') as out:
+                    if env_file.exists():
+                        with open(env_file, 'r', encoding='utf-8') as f:
+                            for line in f:
+                                key, sep, _ = line.partition('=')
+                                if sep and key.strip() == 'GITHUB_TOKEN':
+                                    if replaced:
+                                        continue
+                                    line = f'GITHUB_TOKEN={token}\n'
+                                    replaced = True
+                                out.write(line)
+                                last_line = line
+                    if not replaced:
+                        if last_line and not last_line.endswith('\n'):
+                            out.write('\n')
+                        out.write(f'\n# GitHub Token for Actions Improver\nGITHUB_TOKEN={token}\n')
+                
+                # Swap in atomically with secure permissions
+                os.replace(tmp_file, env_file)
+            except BaseException:
+                # Never leave a stray copy of the token behind
+                tmp_file.unlink(missing_ok=True)
+                raise
             
             # Set for current session
             os.environ['GITHUB_TOKEN'] = token
             
             return True
-        except:
+        except (OSError, UnicodeDecodeError):
+            return False
+    
+    def _claude_env_token_file(self, env_file: Path) -> Optional[Path]:
+        """Path referenced by a 'GITHUB_TOKEN=file://<path>' entry in env_file, if any"""
+        if not env_file.exists():
+            return None
+        with open(env_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                key, sep, value = line.partition('=')
+                if sep and key.strip() == 'GITHUB_TOKEN':
+                    value = value.strip()
+                    if value.startswith('file://'):
+                        return Path(value[len('file://'):]).expanduser()
+                    return None
+        return None
+    
+    def _store_in_token_file(self, token_file: Path, token: str) -> bool:
+        """Replace the token held in the file a .env 'file://' entry points at"""
+        if token_file.exists() and not token_file.is_file():
+            print(f"⚠️  GITHUB_TOKEN in .env points at {token_file}, which is not a regular file; "
+                  f"update that secret yourself")
             return False
+        
+        tmp_file = token_file.with_name(f".{token_file.name}.tmp")
+        tmp_file.unlink(missing_ok=True)
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            with open(fd, 'w', encoding='utf-8') as out:
+                out.write(f'{token}\n')
+            os.replace(tmp_file, token_file)
+        except BaseException:
+            tmp_file.unlink(missing_ok=True)
+            raise
+        
+        print(f"🔗 Updated {token_file}, referenced by GITHUB_TOKEN in .env")
+        os.environ['GITHUB_TOKEN'] = token
+        return True
     
     def _store_in_environment(self, token: str) -> bool:
         """Store as environment variable"""
         try:
             os.environ['GITHUB_TOKEN'] = token
             return True
-        except:
+        except (OSError, ValueError):
             return False
     
     def _get_storage_description(self, method: str) -> str:
@@ -387,20 +500,28 @@ Please try manual setup:
     def _test_token_integration(self, token: str) -> str:
         """Test token integration with GitHub API"""
         try:
-            import urllib.request
-            import json
-            
-            request = urllib.request.Request(
-                "https://api.github.com/rate_limit",
-                headers={"Authorization": f"token {token}"}
-            )
+            if ClaudeTokenSetup._api_conn is None:
+                ClaudeTokenSetup._api_conn = http.client.HTTPSConnection(
+                    GITHUB_API_HOST, timeout=GITHUB_API_TIMEOUT)
+            conn = ClaudeTokenSetup._api_conn
+            conn.request("GET", "/rate_limit", headers={
+                "Authorization": f"token {token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+                "User-Agent": "claude-github-actions-improver",
+            })
+            response = conn.getresponse()
+            body = response.read()  # drain fully so the connection can be reused
+            if response.status != 200:
+                raise http.client.HTTPException(response.status)
+            core_limit = json.loads(body)['rate']['core']
             
-            with urllib.request.urlopen(request, timeout=10) as response:
-                data = json.loads(response.read().decode())
-                core_limit = data['rate']['core']
-                
-                return f"Verified with GitHub API ({core_limit['remaining']}/{core_limit['limit']} requests available)"
-        except:
+            return f"Verified with GitHub API ({core_limit['remaining']}/{core_limit['limit']} requests available)"
+        except (OSError, http.client.HTTPException, ValueError, KeyError, TypeError):
+            # Drop a possibly broken connection; the next check reconnects
+            if ClaudeTokenSetup._api_conn is not None:
+                ClaudeTokenSetup._api_conn.close()
+                ClaudeTokenSetup._api_conn = None
             return "Token stored (API test skipped)"
 
 def main():
@@ -427,7 +548,8 @@ def main():
         # Interactive mode
         print("🚀 Claude GitHub Token Setup")
         print("=" * 40)
-        print(setup.show_status_report())
+        status = setup.check_current_setup()
+        print(setup.show_status_report(status))
         print(setup.get_setup_options())
 
 if __name__ == "__main__":
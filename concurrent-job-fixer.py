@@ -4,20 +4,104 @@ Concurrent GitHub Actions Job Fixer
 Handles multiple failing jobs simultaneously with configurable concurrency levels
 """
 
+import asyncio
 import concurrent.futures
 import json
+import re
 import subprocess
+import sys
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import dataclasses
 from dataclasses import dataclass
 from pathlib import Path
 import threading
-from queue import Queue
 import argparse
 
+try:
+    import orjson  # optional: faster JSON parsing when installed
+except ImportError:
+    orjson = None
+
+# Timeouts (seconds) for external commands: local checks vs GitHub API round trips
+GH_QUICK_TIMEOUT = 10
+GH_NETWORK_TIMEOUT = 60
+
+def _run(cmd: List[str], timeout: float = GH_QUICK_TIMEOUT, retries: int = 2,
+         **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run with a timeout, retrying timed-out commands with exponential backoff"""
+    for attempt in range(retries + 1):
+        try:
+            return subprocess.run(cmd, timeout=timeout, **kwargs)
+        except subprocess.TimeoutExpired:
+            if attempt == retries:
+                raise
+            time.sleep(2 ** attempt)
+
+async def _run_async(cmd: List[str], timeout: float = GH_QUICK_TIMEOUT, retries: int = 2,
+                     cwd: Optional[Path] = None) -> Tuple[int, bytes]:
+    """Asyncio counterpart of _run: (returncode, stdout) with the same timeout and backoff"""
+    for attempt in range(retries + 1):
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL, cwd=cwd)
+        try:
+            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout)
+            return proc.returncode, stdout
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            if attempt == retries:
+                raise
+            await asyncio.sleep(2 ** attempt)
+
+def _json_loads(data: bytes):
+    """Parse JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Log signatures checked in order: (pattern, error type, confidence, suggested fix)
+LOG_PATTERNS = [
+    (re.compile(r'ModuleNotFoundError|ImportError|No module named'), "python_import_error", 0.92,
+     "Add missing Python dependencies to requirements.txt"),
+    (re.compile(r'SyntaxError'), "python_syntax_error", 0.98,
+     "Fix Python syntax errors in source code"),
+    (re.compile(r'npm ERR!'), "npm_error", 0.95,
+     "Fix package.json issues and npm dependencies"),
+    (re.compile(r'COPY failed|failed to solve|Dockerfile'), "docker_error", 0.78,
+     "Fix Dockerfile configuration and build context"),
+    (re.compile(r'\b[EWF]\d{3}\b|flake8'), "flake8_error", 0.91,
+     "Fix linting issues"),
+    (re.compile(r'Permission denied|Resource not accessible by integration'), "permission_error", 0.89,
+     "Fix workflow permissions"),
+]
+
+# Job-name fallbacks: (error type, confidence, suggested fix)
+PYTHON_IMPORT_FIX = ("python_import_error", 0.92, "Add missing Python dependencies to requirements.txt")
+PYTHON_SYNTAX_FIX = ("python_syntax_error", 0.98, "Fix Python syntax errors in source code")
+NPM_FIX = ("npm_error", 0.95, "Fix package.json issues and npm dependencies")
+# Checked in order against the lower-cased job name
+NAME_HEURISTICS = (
+    (("node",), NPM_FIX),
+    (("docker",), ("docker_error", 0.78, "Fix Dockerfile configuration and build context")),
+    (("deploy",), ("deployment_error", 0.88, "Fix deployment configuration and secrets")),
+    (("security", "codeql"), ("security_scan_error", 0.96, "Fix security scanning configuration")),
+)
+
+# Failed check runs of each workflow run (check suite) on a commit
+_FAILED_CHECK_SUITES_FRAGMENT = (
+    "checkSuites(first: 50) { nodes { workflowRun { databaseId } "
+    "checkRuns(first: 100, filterBy: {checkType: LATEST, conclusions: [FAILURE]}) { nodes { name } } } }"
+)
+
 @dataclass
 class FailedJob:
     """Represents a failed GitHub Actions job"""
+    # Declared by hand rather than dataclass(slots=True), which needs Python 3.10
+    __slots__ = ('run_id', 'job_name', 'workflow_name', 'error_type',
+                 'confidence', 'logs', 'suggested_fix', '_jitter')
+    
     run_id: str
     job_name: str
     workflow_name: str
@@ -25,33 +109,49 @@ class FailedJob:
     confidence: float
     logs: str
     suggested_fix: str
+    
+    def __post_init__(self):
+        # Stable per-job fraction in [0, 1) used to vary simulated work times
+        self._jitter = (hash(self.job_name) % 100) / 100
+
+# Sample failures used when the GitHub CLI is unavailable
+_DEMO_FAILED_JOBS = (
+    FailedJob("12345", "test-python-3.11", "CI", "import_error", 0.92, "ModuleNotFoundError: requests", "Add requests to requirements.txt"),
+    FailedJob("12346", "build-frontend", "CI", "npm_error", 0.95, "npm ERR! ENOENT: package.json", "Add package.json check"),
+    FailedJob("12347", "integration-tests", "CI", "database_timeout", 0.67, "connection timeout", "Increase timeout to 60s"),
+    FailedJob("12348", "deploy-staging", "Deploy", "missing_secret", 0.88, "SECRET_KEY not found", "Add conditional secret check"),
+    FailedJob("12349", "security-codeql", "Security", "matrix_error", 0.96, "matrix.language error", "Fix CodeQL matrix syntax"),
+    FailedJob("12350", "test-python-3.9", "CI", "dependency_conflict", 0.84, "Version conflict", "Pin dependency versions"),
+    FailedJob("12351", "build-docker", "CI", "dockerfile_error", 0.78, "COPY failed", "Fix Dockerfile path"),
+    FailedJob("12352", "lint-code", "CI", "flake8_error", 0.91, "E501 line too long", "Fix linting issues"),
+    FailedJob("12353", "test-integration", "CI", "api_timeout", 0.73, "API request timeout", "Increase API timeout"),
+    FailedJob("12354", "deploy-prod", "Deploy", "permission_error", 0.89, "Permission denied", "Fix deployment permissions"),
+)
 
 class ConcurrentJobFixer:
     """Multi-threaded GitHub Actions job fixer"""
     
-    def __init__(self, max_workers: int = 8, repo_path: str = "."):
+    def __init__(self, max_workers: int = 8, repo_path: str = ".", simulate: bool = False):
         self.max_workers = max_workers
+        self.simulate = simulate
         self.repo_path = Path(repo_path)
-        self.progress_queue = Queue()
         self.results_lock = threading.Lock()
+        self._bar_full = "█" * 25
+        self._bar_empty = "░" * 25
         
-    def print_progress_thread(self, total_jobs: int):
-        """Background thread for printing progress updates"""
-        completed = 0
-        while completed < total_jobs:
-            try:
-                message = self.progress_queue.get(timeout=1)
-                if message == "COMPLETE":
-                    completed += 1
-                    percent = (completed / total_jobs) * 100
-                    filled = int(percent // 4)
-                    bar = "█" * filled + "░" * (25 - filled)
-                    print(f"\rProgress: |{bar}| {percent:.1f}% ({completed}/{total_jobs})", end="", flush=True)
-                else:
-                    print(f"\n{message}", flush=True)
-            except:
-                continue
-        print()  # Final newline
+    def report(self, message: str):
+        """Print a status line from any worker without interleaving output"""
+        with self.results_lock:
+            print(f"\n{message}", flush=True)
+    
+    def print_progress(self, completed: int, total_jobs: int):
+        """Redraw the progress bar for the current phase"""
+        percent = (completed / total_jobs) * 100
+        filled = int(percent // 4)
+        bar = self._bar_full[:filled] + self._bar_empty[filled:]
+        with self.results_lock:
+            sys.stdout.write(f"\rProgress: |{bar}| {percent:.1f}% ({completed}/{total_jobs})")
+            sys.stdout.flush()
                 
     def get_failed_jobs(self, days: int = 7) -> List[FailedJob]:
         """Fetch all failed jobs from recent workflow runs"""
@@ -63,120 +163,157 @@ class ConcurrentJobFixer:
                 "gh", "run", "list", 
                 "--limit", "50",
                 "--status", "failure",
-                "--json", "databaseId,name,workflowName,jobs,createdAt"
+                "--json", "databaseId,workflowName,headSha"
             ]
-            result = subprocess.run(cmd, capture_output=True, text=True, cwd=self.repo_path)
+            result = _run(cmd, timeout=GH_NETWORK_TIMEOUT,
+                          capture_output=True, cwd=self.repo_path)
             
             if result.returncode != 0:
                 print("⚠️ GitHub CLI not available, using simulated data for demo")
                 return self._generate_demo_failed_jobs()
                 
-            runs_data = json.loads(result.stdout)
-            failed_jobs = []
+            runs_data = _json_loads(result.stdout)[:10]  # Limit to 10 runs to avoid API limits
             
-            for run in runs_data[:10]:  # Limit to 10 runs to avoid API limits
-                run_id = str(run['databaseId'])
-                
-                # Get detailed job info
-                job_cmd = ["gh", "run", "view", run_id, "--json", "jobs"]
-                job_result = subprocess.run(job_cmd, capture_output=True, text=True, cwd=self.repo_path)
-                
-                if job_result.returncode == 0:
-                    job_data = json.loads(job_result.stdout)
-                    
-                    for job in job_data.get('jobs', []):
-                        if job.get('conclusion') == 'failure':
-                            failed_jobs.append(FailedJob(
-                                run_id=run_id,
-                                job_name=job['name'],
-                                workflow_name=run['workflowName'],
-                                error_type="unknown",
-                                confidence=0.0,
-                                logs="",
-                                suggested_fix=""
-                            ))
-                            
+            # One GraphQL query for every run; per-run views only for runs it missed
+            failed_by_run = self._get_failed_job_names(runs_data)
+            missing = [run for run in runs_data if run['databaseId'] not in failed_by_run]
+            if missing:
+                names_per_run = asyncio.run(self._view_failed_job_names(missing))
+                failed_by_run.update(zip((run['databaseId'] for run in missing), names_per_run))
+            
+            failed_jobs = [
+                FailedJob(
+                    run_id=str(run['databaseId']),
+                    job_name=job_name,
+                    workflow_name=run['workflowName'],
+                    error_type="unknown",
+                    confidence=0.0,
+                    logs="",
+                    suggested_fix=""
+                )
+                for run in runs_data
+                for job_name in failed_by_run.get(run['databaseId'], [])
+            ]
             return failed_jobs[:20]  # Limit to 20 jobs max
             
         except Exception as e:
             print(f"⚠️ Error fetching jobs: {e}")
             return self._generate_demo_failed_jobs()
     
+    def _get_failed_job_names(self, runs: List[Dict]) -> Dict[int, List[str]]:
+        """Failed job names per run id, fetched for all runs in one GraphQL query"""
+        shas = list(dict.fromkeys(run['headSha'] for run in runs if run.get('headSha')))
+        if not shas:
+            return {}
+        
+        commit_fields = " ".join(
+            f'c{i}: object(oid: "{sha}") {{ ... on Commit {{ {_FAILED_CHECK_SUITES_FRAGMENT} }} }}'
+            for i, sha in enumerate(shas)
+        )
+        query = ("query($owner: String!, $name: String!) { "
+                 "repository(owner: $owner, name: $name) { " + commit_fields + " } }")
+        cmd = ["gh", "api", "graphql", "-F", "owner={owner}", "-F", "name={repo}",
+               "-f", f"query={query}"]
+        try:
+            result = _run(cmd, timeout=GH_NETWORK_TIMEOUT,
+                          capture_output=True, cwd=self.repo_path)
+        except subprocess.TimeoutExpired:
+            return {}
+        if result.returncode != 0:
+            return {}
+        try:
+            repository = (_json_loads(result.stdout).get('data') or {}).get('repository') or {}
+        except ValueError:
+            return {}
+        wanted = {run['databaseId'] for run in runs}
+        failed_by_run = {}
+        for commit in repository.values():
+            for suite in ((commit or {}).get('checkSuites') or {}).get('nodes', []):
+                run_id = (suite.get('workflowRun') or {}).get('databaseId')
+                if run_id in wanted:
+                    failed_by_run[run_id] = [check_run['name'] for check_run in suite['checkRuns']['nodes']]
+        return failed_by_run
+    
+    async def _view_failed_job_names(self, runs: List[Dict]) -> List[List[str]]:
+        """Failed job names for each run via concurrent `gh run view` subprocesses"""
+        semaphore = asyncio.Semaphore(self.max_workers)
+        
+        async def view(run: Dict) -> List[str]:
+            job_cmd = ["gh", "run", "view", str(run['databaseId']), "--json", "jobs"]
+            async with semaphore:
+                try:
+                    returncode, stdout = await _run_async(job_cmd, timeout=GH_NETWORK_TIMEOUT,
+                                                          cwd=self.repo_path)
+                except asyncio.TimeoutError:
+                    return []
+            if returncode != 0:
+                return []
+            job_data = _json_loads(stdout)
+            return [job['name'] for job in job_data.get('jobs', []) if job.get('conclusion') == 'failure']
+        
+        return await asyncio.gather(*(view(run) for run in runs))
+    
     def _generate_demo_failed_jobs(self) -> List[FailedJob]:
         """Generate demo failed jobs for testing"""
-        return [
-            FailedJob("12345", "test-python-3.11", "CI", "import_error", 0.92, "ModuleNotFoundError: requests", "Add requests to requirements.txt"),
-            FailedJob("12346", "build-frontend", "CI", "npm_error", 0.95, "npm ERR! ENOENT: package.json", "Add package.json check"),
-            FailedJob("12347", "integration-tests", "CI", "database_timeout", 0.67, "connection timeout", "Increase timeout to 60s"),
-            FailedJob("12348", "deploy-staging", "Deploy", "missing_secret", 0.88, "SECRET_KEY not found", "Add conditional secret check"),
-            FailedJob("12349", "security-codeql", "Security", "matrix_error", 0.96, "matrix.language error", "Fix CodeQL matrix syntax"),
-            FailedJob("12350", "test-python-3.9", "CI", "dependency_conflict", 0.84, "Version conflict", "Pin dependency versions"),
-            FailedJob("12351", "build-docker", "CI", "dockerfile_error", 0.78, "COPY failed", "Fix Dockerfile path"),
-            FailedJob("12352", "lint-code", "CI", "flake8_error", 0.91, "E501 line too long", "Fix linting issues"),
-            FailedJob("12353", "test-integration", "CI", "api_timeout", 0.73, "API request timeout", "Increase API timeout"),
-            FailedJob("12354", "deploy-prod", "Deploy", "permission_error", 0.89, "Permission denied", "Fix deployment permissions")
-        ]
+        # Fresh copies: analysis mutates the jobs it is given
+        return [dataclasses.replace(job) for job in _DEMO_FAILED_JOBS]
     
     def analyze_job_failure(self, job: FailedJob) -> FailedJob:
         """Analyze a single job failure and determine fix strategy"""
         job_id = f"{job.workflow_name}/{job.job_name}"
-        self.progress_queue.put(f"🔍 Analyzing {job_id}...")
+        self.report(f"🔍 Analyzing {job_id}...")
         
-        # Simulate analysis time
-        time.sleep(0.5 + (hash(job.job_name) % 100) / 100)  # 0.5-1.5s
+        if self.simulate:
+            # Simulate analysis time
+            time.sleep(0.5 + job._jitter)  # 0.5-1.5s
         
-        # Pattern matching based on job name and simulated logs
-        if "python" in job.job_name.lower():
-            if "import" in job.logs.lower() or "module" in job.logs.lower():
-                job.error_type = "python_import_error"
-                job.confidence = 0.92
-                job.suggested_fix = "Add missing Python dependencies to requirements.txt"
-            elif "syntax" in job.logs.lower():
-                job.error_type = "python_syntax_error"
-                job.confidence = 0.98
-                job.suggested_fix = "Fix Python syntax errors in source code"
+        # Known log signatures are the most specific evidence
+        for pattern, error_type, confidence, suggested_fix in LOG_PATTERNS:
+            if pattern.search(job.logs):
+                job.error_type = error_type
+                job.confidence = confidence
+                job.suggested_fix = suggested_fix
+                self.report(f"📊 {job_id}: {job.error_type} (confidence: {job.confidence:.2f})")
+                return job
         
-        elif "npm" in job.logs.lower() or "node" in job.job_name.lower():
-            job.error_type = "npm_error"
-            job.confidence = 0.95
-            job.suggested_fix = "Fix package.json issues and npm dependencies"
-            
-        elif "docker" in job.job_name.lower():
-            job.error_type = "docker_error"
-            job.confidence = 0.78
-            job.suggested_fix = "Fix Dockerfile configuration and build context"
-            
-        elif "deploy" in job.job_name.lower():
-            job.error_type = "deployment_error"
-            job.confidence = 0.88
-            job.suggested_fix = "Fix deployment configuration and secrets"
-            
-        elif "security" in job.job_name.lower() or "codeql" in job.job_name.lower():
-            job.error_type = "security_scan_error"
-            job.confidence = 0.96
-            job.suggested_fix = "Fix security scanning configuration"
+        # Otherwise fall back to pattern matching on the job name
+        name_lc = job.job_name.lower()
+        logs_lc = job.logs.lower()
+        if "python" in name_lc:
+            if "import" in logs_lc or "module" in logs_lc:
+                job.error_type, job.confidence, job.suggested_fix = PYTHON_IMPORT_FIX
+            elif "syntax" in logs_lc:
+                job.error_type, job.confidence, job.suggested_fix = PYTHON_SYNTAX_FIX
+        elif "npm" in logs_lc:
+            job.error_type, job.confidence, job.suggested_fix = NPM_FIX
+        else:
+            for keywords, fix in NAME_HEURISTICS:
+                if any(keyword in name_lc for keyword in keywords):
+                    job.error_type, job.confidence, job.suggested_fix = fix
+                    break
         
-        self.progress_queue.put(f"📊 {job_id}: {job.error_type} (confidence: {job.confidence:.2f})")
+        self.report(f"📊 {job_id}: {job.error_type} (confidence: {job.confidence:.2f})")
         return job
     
     def apply_job_fix(self, job: FailedJob) -> Dict[str, Any]:
         """Apply fix for a single job"""
         job_id = f"{job.workflow_name}/{job.job_name}"
-        self.progress_queue.put(f"🔧 Applying fix to {job_id}...")
+        self.report(f"🔧 Applying fix to {job_id}...")
         
-        # Simulate fix application time
-        time.sleep(0.3 + (hash(job.job_name) % 50) / 100)  # 0.3-0.8s
+        if self.simulate:
+            # Simulate fix application time
+            time.sleep(0.3 + job._jitter * 0.5)  # 0.3-0.8s
         
         # Determine if fix should be applied based on confidence
         if job.confidence >= 0.8:
             status = "applied"
-            self.progress_queue.put(f"✅ {job_id}: Auto-fixed ({job.suggested_fix})")
+            self.report(f"✅ {job_id}: Auto-fixed ({job.suggested_fix})")
         elif job.confidence >= 0.5:
             status = "needs_review"
-            self.progress_queue.put(f"❓ {job_id}: Needs review ({job.suggested_fix})")
+            self.report(f"❓ {job_id}: Needs review ({job.suggested_fix})")
         else:
             status = "manual_review"
-            self.progress_queue.put(f"⚠️ {job_id}: Manual review required (low confidence)")
+            self.report(f"⚠️ {job_id}: Manual review required (low confidence)")
         
         return {
             "job": job,
@@ -192,14 +329,6 @@ class ConcurrentJobFixer:
         
         print(f"🚀 Processing {len(jobs)} failed jobs with {self.max_workers} concurrent workers...")
         
-        # Start progress monitoring thread
-        progress_thread = threading.Thread(
-            target=self.print_progress_thread,
-            args=(len(jobs),),
-            daemon=True
-        )
-        progress_thread.start()
-        
         # Phase 1: Concurrent failure analysis
         print(f"\n📋 PHASE 1: ANALYZING {len(jobs)} JOBS CONCURRENTLY")
         print("-" * 50)
@@ -212,11 +341,13 @@ class ConcurrentJobFixer:
             }
             
             analyzed_jobs = []
-            for future in concurrent.futures.as_completed(analysis_futures):
-                analyzed_job = future.result()
-                analyzed_jobs.append(analyzed_job)
+            for completed, future in enumerate(concurrent.futures.as_completed(analysis_futures), 1):
+                analyzed_jobs.append(future.result())
+                self.print_progress(completed, len(jobs))
+        print()
         
-        time.sleep(0.5)  # Brief pause between phases
+        if self.simulate:
+            time.sleep(0.5)  # Brief pause between phases
         
         # Phase 2: Concurrent fix application
         print(f"\n🔧 PHASE 2: APPLYING FIXES TO {len(analyzed_jobs)} JOBS")
@@ -230,10 +361,10 @@ class ConcurrentJobFixer:
             }
             
             results = []
-            for future in concurrent.futures.as_completed(fix_futures):
-                result = future.result()
-                results.append(result)
-                self.progress_queue.put("COMPLETE")
+            for completed, future in enumerate(concurrent.futures.as_completed(fix_futures), 1):
+                results.append(future.result())
+                self.print_progress(completed, len(analyzed_jobs))
+        print()  # Final newline
         
         return results
     
@@ -287,6 +418,7 @@ def main():
     parser.add_argument('--workers', type=int, default=8, help='Max concurrent workers (default: 8)')
     parser.add_argument('--days', type=int, default=7, help='Days of history to analyze (default: 7)')
     parser.add_argument('--repo-path', default='.', help='Repository path (default: current directory)')
+    parser.add_argument('--simulate', action='store_true', help='Add artificial delays to mimic slow analysis (demo)')
     
     args = parser.parse_args()
     
@@ -294,7 +426,8 @@ def main():
     print(f"📊 Configuration: {args.workers} workers, {args.days}-day history")
     print("="*60)
     
-    fixer = ConcurrentJobFixer(max_workers=args.workers, repo_path=args.repo_path)
+    fixer = ConcurrentJobFixer(max_workers=args.workers, repo_path=args.repo_path,
+                               simulate=args.simulate)
     
     # Get failed jobs
     failed_jobs = fixer.get_failed_jobs(args.days)
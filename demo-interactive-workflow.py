@@ -7,11 +7,19 @@ Shows how the enhanced system provides real-time feedback
 import time
 import sys
 
+# Cleared by --no-animate to print the whole demo without pauses
+ANIMATE = True
+
+# Every progress bar frame, indexed by the number of filled cells
+BAR_WIDTH = 25
+PROGRESS_BARS = tuple("█" * filled + "░" * (BAR_WIDTH - filled) for filled in range(BAR_WIDTH + 1))
+FRAME_INTERVAL = 0.25  # seconds between progress redraws
+
 def print_with_delay(message, delay=0.5):
     """Print message with delay to simulate streaming"""
-    print(message)
-    sys.stdout.flush()
-    time.sleep(delay)
+    print(message, flush=True)
+    if ANIMATE:
+        time.sleep(delay)
 
 def demo_interactive_analysis():
     """Demonstrate interactive workflow analysis"""
@@ -124,21 +132,27 @@ def demo_streaming_fixes():
         print(f"\n[{i}/4] {file}")
         print(f"🔍 {description}")
         
-        # Simulate progress
-        for j in range(int(duration * 4)):
-            percent = (j + 1) / (duration * 4) * 100
-            filled = int(percent // 4)
-            bar = "█" * filled + "░" * (25 - filled)
-            print(f"\r   Progress: |{bar}| {percent:.1f}%", end="", flush=True)
-            time.sleep(0.25)
+        # Simulate progress; frames follow elapsed time so slow redraws don't stretch the fix
+        if ANIMATE:
+            start = time.monotonic()
+            while (elapsed := time.monotonic() - start) < duration:
+                fraction = elapsed / duration
+                sys.stdout.write(f"\r   Progress: |{PROGRESS_BARS[int(fraction * BAR_WIDTH)]}| {fraction * 100:.1f}%")
+                sys.stdout.flush()
+                time.sleep(min(FRAME_INTERVAL, duration - elapsed))
         
-        print(f"\r   Progress: |{'█' * 25}| 100.0% ✅")
+        print(f"\r   Progress: |{PROGRESS_BARS[BAR_WIDTH]}| 100.0% ✅")
         print(f"   ✅ {file} updated successfully")
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1 and sys.argv[1] == "--fixes":
-        demo_streaming_fixes()
-    else:
-        demo_interactive_analysis()
+    ANIMATE = "--no-animate" not in sys.argv
+    try:
+        if "--fixes" in sys.argv:
+            demo_streaming_fixes()
+        else:
+            demo_interactive_analysis()
+    except KeyboardInterrupt:
+        print("\n⏹️ Demo skipped")
+        sys.exit(130)
         
-    print(f"\n💡 Run with --fixes to see streaming fix application demo")
\ No newline at end of file
+    print(f"\n💡 Run with --fixes to see streaming fix application demo (--no-animate to skip pauses)")
\ No newline at end of file
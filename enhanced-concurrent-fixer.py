@@ -7,22 +7,152 @@ With intelligent API rate limit handling and GitHub token support
 import os
 import time
 import json
+import re
 import subprocess
+import http.client
 import concurrent.futures
-from typing import List, Dict, Any
+from collections import Counter
+from typing import List, Dict, Any, Optional
+import dataclasses
+from dataclasses import dataclass, field
 from pathlib import Path
 import argparse
 import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
+import threading
 import importlib.util
-spec = importlib.util.spec_from_file_location("api_limit_handler", "api-limit-handler.py")
-api_limit_handler = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(api_limit_handler)
+
+def _load_api_limit_handler():
+    """Load api-limit-handler.py (not importable by name because of the dash), once per process"""
+    module = sys.modules.get("api_limit_handler")
+    if module is None:
+        spec = importlib.util.spec_from_file_location(
+            "api_limit_handler", Path(__file__).parent / "api-limit-handler.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["api_limit_handler"] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules["api_limit_handler"]
+            raise
+    return module
+
+api_limit_handler = _load_api_limit_handler()
 GitHubAPILimitHandler = api_limit_handler.GitHubAPILimitHandler
 RateLimit = api_limit_handler.RateLimit
 
+# Error signatures checked in order: (pattern, fix type, suggested fix, confidence)
+ERROR_PATTERNS = [
+    (re.compile(r'ModuleNotFoundError|(?i:import)'), 'python_import_fix',
+     'Add missing Python dependencies to requirements.txt', 0.95),
+    (re.compile(r'npm ERR!|package\.json'), 'npm_dependency_fix',
+     'Fix package.json and npm dependency issues', 0.98),
+    (re.compile(r'(?i:database)|psql'), 'database_config_fix',
+     'Fix database configuration and connection', 0.89),
+    (re.compile(r'(?i:matrix)'), 'workflow_matrix_fix',
+     'Fix workflow matrix configuration', 0.96),
+    (re.compile(r'(?i:secret)'), 'secret_config_fix',
+     'Fix secret configuration and access', 0.92),
+]
+GENERIC_FIX = ('generic_fix', 'Generic workflow fix needed', 0.6)
+
+# Jobs handed to the pipeline per invocation, to avoid overwhelming reviewers
+MAX_FAILED_JOBS = 30
+
+# API requests budgeted per job for analysis (log fetch) and fix application
+REQUESTS_PER_JOB = 2
+
+# Upper bound on concurrent per-run job lookups, below GitHub's secondary rate limits
+MAX_FETCH_WORKERS = 10
+# Hard ceiling on in-flight API requests and pipeline workers, whatever the handler suggests
+MAX_CONCURRENT_REQUESTS = 25
+
+# Failed jobs per finished run attempt, reused across invocations
+RUN_JOBS_CACHE_FILE = Path.home() / ".claude" / "github-actions-improver" / "run_jobs_cache.json"
+RUN_JOBS_CACHE_MAX = 500
+
+def _run_cache_key(run: Dict[str, Any]) -> str:
+    """Cache key for a run attempt; a re-run gets a new attempt number and new jobs"""
+    return f"{run['databaseId']}:{run.get('attempt', 1)}"
+
+# owner/repo from a github.com workflow run URL, for REST calls
+_RUN_URL_RE = re.compile(r'https://github\.com/(?P<repo>[^/]+/[^/]+)/actions/runs/')
+
+# Failed check runs (jobs) of each workflow run (check suite) on a commit
+_FAILED_CHECK_SUITES_FRAGMENT = (
+    "checkSuites(first: 50) { nodes { workflowRun { databaseId } "
+    "checkRuns(first: 100, filterBy: {checkType: LATEST, conclusions: [FAILURE]}) "
+    "{ nodes { name databaseId detailsUrl } } } }"
+)
+
+# slots=True needs Python 3.10; older interpreters fall back to a regular dataclass
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_DATACLASS_SLOTS)
+class FailedJob:
+    """A failed GitHub Actions job as it moves through analysis and fix application"""
+    run_id: str
+    job_name: str
+    workflow_name: str
+    created_at: str = ""
+    job_id: Any = ""
+    logs_url: str = ""
+    error_pattern: str = ""
+    confidence: float = 0.5
+    fix_type: str = ""
+    suggested_fix: str = ""
+    fix_status: str = ""
+    fix_applied: bool = False
+    analysis_complete: bool = False
+    label: str = field(init=False, default="", repr=False, compare=False)
+    
+    def __post_init__(self):
+        # "workflow/job" as shown in every status line
+        self.label = f"{self.workflow_name}/{self.job_name}"
+
+# Sample failures used when the GitHub CLI is unavailable
+_DEMO_JOBS = (
+    FailedJob(
+        run_id='12345678',
+        job_name='test (3.11, ubuntu-latest)',
+        workflow_name='CI',
+        job_id='job_1',
+        error_pattern='ModuleNotFoundError: No module named \'requests\'',
+        confidence=0.95
+    ),
+    FailedJob(
+        run_id='12345679',
+        job_name='build-frontend',
+        workflow_name='CI',
+        job_id='job_2',
+        error_pattern='npm ERR! ENOENT: no such file or directory, open \'package.json\'',
+        confidence=0.98
+    ),
+    FailedJob(
+        run_id='12345680',
+        job_name='integration-tests',
+        workflow_name='CI',
+        job_id='job_3',
+        error_pattern='psql: FATAL: database "test" does not exist',
+        confidence=0.89
+    ),
+    FailedJob(
+        run_id='12345681',
+        job_name='security-codeql',
+        workflow_name='Security',
+        job_id='job_4',
+        error_pattern='Error: matrix.language is not defined',
+        confidence=0.96
+    ),
+    FailedJob(
+        run_id='12345682',
+        job_name='deploy-staging',
+        workflow_name='Deploy',
+        job_id='job_5',
+        error_pattern='Error: DEPLOY_KEY secret not found',
+        confidence=0.92
+    ),
+)
+
 class EnhancedConcurrentJobFixer:
     """Advanced concurrent job fixer with API limit management"""
     
@@ -30,8 +160,9 @@ class EnhancedConcurrentJobFixer:
         self.repo_path = Path(repo_path)
         self.api_handler = GitHubAPILimitHandler(token)
         self.processed_jobs = 0
+        self._request_gate = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
         
-    def get_authenticated_failed_jobs(self, days: int = 7) -> List[Dict[str, Any]]:
+    def get_authenticated_failed_jobs(self, days: int = 7) -> List[FailedJob]:
         """Fetch failed jobs using authenticated GitHub API"""
         print(f"🔍 Fetching failed jobs from last {days} days...")
         
@@ -46,7 +177,7 @@ class EnhancedConcurrentJobFixer:
                 "gh", "run", "list",
                 "--limit", "50", 
                 "--status", "failure",
-                "--json", "databaseId,name,workflowName,createdAt,conclusion"
+                "--json", "databaseId,name,workflowName,createdAt,conclusion,headSha,url,attempt"
             ]
             
             cmd = self.api_handler.create_authenticated_gh_command(base_cmd)
@@ -57,116 +188,182 @@ class EnhancedConcurrentJobFixer:
                 return self._generate_demo_jobs()
             
             runs_data = json.loads(result.stdout)
-            failed_jobs = []
             
             print(f"📊 Found {len(runs_data)} failed runs, extracting job details...")
             
-            # Process runs in batches to respect rate limits
+            # A finished run attempt never changes, so reuse jobs fetched on earlier invocations
+            cache = self._load_run_jobs_cache()
+            jobs_by_run = {
+                run['databaseId']: cache[_run_cache_key(run)]
+                for run in runs_data if _run_cache_key(run) in cache
+            }
+            to_fetch = [run for run in runs_data if run['databaseId'] not in jobs_by_run]
+            if jobs_by_run:
+                print(f"⏭️  {len(jobs_by_run)} runs already cached, fetching {len(to_fetch)}")
+            
+            # One GraphQL query covers every run; per-run views only for runs it missed
+            if to_fetch:
+                jobs_by_run.update(self._get_failed_jobs_by_run(to_fetch))
+            missing = self._runs_needed_for_cap(runs_data, jobs_by_run)
+            
+            # Process runs in batches; the handler's token bucket paces each batch and
+            # request() backs off on rate-limit and 5xx responses, so no fixed sleeps
             batch_size = self.api_handler._get_optimal_batch_size()
-            wait_time = self.api_handler._get_wait_time()
+            fetch_workers = min(MAX_FETCH_WORKERS, self.api_handler.get_optimal_worker_count()) if missing else 1
             
-            for i in range(0, len(runs_data), batch_size):
-                batch = runs_data[i:i + batch_size]
-                
-                print(f"📦 Processing batch {i//batch_size + 1}/{(len(runs_data) + batch_size - 1)//batch_size}")
-                
-                # Check rate limits before each batch
-                if not self.api_handler.check_rate_limit_before_request(len(batch)):
-                    print("⏳ Rate limit reached, waiting...")
-                    time.sleep(60)  # Wait a minute
-                
-                for run in batch:
-                    run_id = str(run['databaseId'])
-                    
-                    # Get detailed job information
-                    job_cmd = self.api_handler.create_authenticated_gh_command([
-                        "gh", "run", "view", run_id, "--json", "jobs"
-                    ])
+            with concurrent.futures.ThreadPoolExecutor(max_workers=fetch_workers) as executor:
+                for i in range(0, len(missing), batch_size):
+                    batch = missing[i:i + batch_size]
                     
-                    job_result = subprocess.run(job_cmd, capture_output=True, text=True, cwd=self.repo_path)
+                    print(f"📦 Processing batch {i//batch_size + 1}/{(len(missing) + batch_size - 1)//batch_size}")
                     
-                    if job_result.returncode == 0:
-                        job_data = json.loads(job_result.stdout)
-                        
-                        for job in job_data.get('jobs', []):
-                            if job.get('conclusion') == 'failure':
-                                failed_jobs.append({
-                                    'run_id': run_id,
-                                    'job_name': job['name'],
-                                    'workflow_name': run['workflowName'],
-                                    'created_at': run['createdAt'],
-                                    'job_id': job.get('databaseId', ''),
-                                    'logs_url': job.get('url', '')
-                                })
+                    # Waits for budget itself; False means the reset is too far away
+                    if not self.api_handler.check_rate_limit_before_request(len(batch)):
+                        print("⏳ Rate limit budget exhausted, skipping remaining runs")
+                        break
                     
-                    # Rate limiting between requests
-                    if wait_time > 0:
-                        time.sleep(wait_time)
-                
-                # Wait between batches
-                if i + batch_size < len(runs_data):
-                    time.sleep(wait_time * 2)
+                    # Get detailed job information for the whole batch concurrently
+                    fetch_futures = {executor.submit(self._fetch_run_jobs, run): run for run in batch}
+                    for future in concurrent.futures.as_completed(fetch_futures):
+                        jobs = future.result()
+                        if jobs is not None:
+                            jobs_by_run[fetch_futures[future]['databaseId']] = jobs
+            
+            fetched = [run for run in to_fetch if run['databaseId'] in jobs_by_run]
+            if fetched:
+                for run in fetched:
+                    cache[_run_cache_key(run)] = jobs_by_run[run['databaseId']]
+                self._save_run_jobs_cache(cache)
+            
+            failed_jobs = [
+                FailedJob(
+                    run_id=str(run['databaseId']),
+                    job_name=job['name'],
+                    workflow_name=run['workflowName'],
+                    created_at=run['createdAt'],
+                    job_id=job.get('databaseId', ''),
+                    logs_url=job.get('url', '')
+                )
+                for run in runs_data
+                for job in jobs_by_run.get(run['databaseId'], [])
+            ]
             
             print(f"✅ Collected {len(failed_jobs)} failed jobs from {len(runs_data)} runs")
-            return failed_jobs[:30]  # Limit to 30 jobs to avoid overwhelming
+            return failed_jobs[:MAX_FAILED_JOBS]
             
         except Exception as e:
             print(f"⚠️ Error fetching jobs: {e}")
             return self._generate_demo_jobs()
     
-    def _generate_demo_jobs(self) -> List[Dict[str, Any]]:
-        """Generate realistic demo failed jobs"""
+    def _runs_needed_for_cap(self, runs: List[Dict[str, Any]],
+                             jobs_by_run: Dict[int, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Runs still lacking job details that can contribute to the first MAX_FAILED_JOBS jobs"""
+        needed = []
+        known_jobs = 0
+        for run in runs:
+            if known_jobs >= MAX_FAILED_JOBS:
+                break
+            if run['databaseId'] in jobs_by_run:
+                known_jobs += len(jobs_by_run[run['databaseId']])
+            else:
+                needed.append(run)
+        return needed
+    
+    def _load_run_jobs_cache(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Failed jobs of previously fetched run attempts, keyed by _run_cache_key"""
+        try:
+            with open(RUN_JOBS_CACHE_FILE, encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cache if isinstance(cache, dict) else {}
+    
+    def _save_run_jobs_cache(self, cache: Dict[str, List[Dict[str, Any]]]):
+        """Persist the newest RUN_JOBS_CACHE_MAX entries atomically"""
+        entries = list(cache.items())[-RUN_JOBS_CACHE_MAX:]
+        try:
+            RUN_JOBS_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = RUN_JOBS_CACHE_FILE.with_suffix(".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(dict(entries), f)
+            os.replace(tmp_file, RUN_JOBS_CACHE_FILE)
+        except OSError as e:
+            print(f"⚠️ Could not update run cache: {e}")
+    
+    def _get_failed_jobs_by_run(self, runs: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
+        """Failed jobs per run id, fetched for all runs in one GraphQL query"""
+        shas = list(dict.fromkeys(run['headSha'] for run in runs if run.get('headSha')))
+        if not shas or not self.api_handler.check_rate_limit_before_request(1):
+            return {}
+        
+        commit_fields = " ".join(
+            f'c{i}: object(oid: "{sha}") {{ ... on Commit {{ {_FAILED_CHECK_SUITES_FRAGMENT} }} }}'
+            for i, sha in enumerate(shas)
+        )
+        query = ("query($owner: String!, $name: String!) { "
+                 "repository(owner: $owner, name: $name) { " + commit_fields + " } }")
+        cmd = self.api_handler.create_authenticated_gh_command([
+            "gh", "api", "graphql", "-F", "owner={owner}", "-F", "name={repo}",
+            "-f", f"query={query}"
+        ])
+        result = subprocess.run(cmd, capture_output=True, text=True, cwd=self.repo_path)
+        if result.returncode != 0:
+            return {}
+        try:
+            repository = (json.loads(result.stdout).get('data') or {}).get('repository') or {}
+        except ValueError:
+            return {}
+        
+        wanted = {run['databaseId'] for run in runs}
+        jobs_by_run = {}
+        for commit in repository.values():
+            for suite in ((commit or {}).get('checkSuites') or {}).get('nodes', []):
+                run_id = (suite.get('workflowRun') or {}).get('databaseId')
+                if run_id in wanted:
+                    # Same shape as `gh run view --json jobs` entries
+                    jobs_by_run[run_id] = [
+                        {'name': check_run['name'], 'databaseId': check_run['databaseId'],
+                         'url': check_run.get('detailsUrl', '')}
+                        for check_run in suite['checkRuns']['nodes']
+                    ]
+        return jobs_by_run
+    
+    def _fetch_run_jobs(self, run: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Failed jobs of one run: REST over the handler's keep-alive connection, else `gh run view`"""
+        match = _RUN_URL_RE.match(run.get('url') or '')
+        if match:
+            url = (f"https://api.github.com/repos/{match['repo']}/actions/runs/"
+                   f"{run['databaseId']}/jobs?filter=latest&per_page=100")
+            try:
+                with self._request_gate:
+                    job_data = self.api_handler.request(url) or {}
+                return [
+                    {'name': job['name'], 'databaseId': job['id'], 'url': job.get('html_url', '')}
+                    for job in job_data.get('jobs', []) if job.get('conclusion') == 'failure'
+                ]
+            except (OSError, http.client.HTTPException, ValueError, KeyError) as e:
+                print(f"⚠️ REST lookup for run {run['databaseId']} failed ({e}), using gh")
+        
+        job_cmd = self.api_handler.create_authenticated_gh_command([
+            "gh", "run", "view", str(run['databaseId']), "--json", "jobs"
+        ])
+        job_result = subprocess.run(job_cmd, capture_output=True, text=True, cwd=self.repo_path)
+        if job_result.returncode != 0:
+            return None
+        job_data = json.loads(job_result.stdout)
         return [
-            {
-                'run_id': '12345678',
-                'job_name': 'test (3.11, ubuntu-latest)',
-                'workflow_name': 'CI',
-                'job_id': 'job_1',
-                'error_pattern': 'ModuleNotFoundError: No module named \'requests\'',
-                'confidence': 0.95
-            },
-            {
-                'run_id': '12345679', 
-                'job_name': 'build-frontend',
-                'workflow_name': 'CI',
-                'job_id': 'job_2',
-                'error_pattern': 'npm ERR! ENOENT: no such file or directory, open \'package.json\'',
-                'confidence': 0.98
-            },
-            {
-                'run_id': '12345680',
-                'job_name': 'integration-tests',
-                'workflow_name': 'CI', 
-                'job_id': 'job_3',
-                'error_pattern': 'psql: FATAL: database "test" does not exist',
-                'confidence': 0.89
-            },
-            {
-                'run_id': '12345681',
-                'job_name': 'security-codeql',
-                'workflow_name': 'Security',
-                'job_id': 'job_4', 
-                'error_pattern': 'Error: matrix.language is not defined',
-                'confidence': 0.96
-            },
-            {
-                'run_id': '12345682',
-                'job_name': 'deploy-staging',
-                'workflow_name': 'Deploy',
-                'job_id': 'job_5',
-                'error_pattern': 'Error: DEPLOY_KEY secret not found',
-                'confidence': 0.92
-            }
+            {'name': job['name'], 'databaseId': job.get('databaseId', ''), 'url': job.get('url', '')}
+            for job in job_data.get('jobs', []) if job.get('conclusion') == 'failure'
         ]
     
-    def analyze_job_with_rate_limiting(self, job: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze job with intelligent rate limit handling"""
-        job_id = f"{job['workflow_name']}/{job['job_name']}"
-        
-        # Check if we need to wait for rate limits
-        if not self.api_handler.check_rate_limit_before_request(2):
-            print(f"⏳ {job_id}: Waiting for rate limit reset...")
-            time.sleep(10)
+    def _generate_demo_jobs(self) -> List[FailedJob]:
+        """Generate realistic demo failed jobs"""
+        # Fresh copies: the pipeline updates jobs in place
+        return [dataclasses.replace(job) for job in _DEMO_JOBS]
+    
+    def analyze_job_with_rate_limiting(self, job: FailedJob) -> FailedJob:
+        """Analyze job; rate limit budget is admitted per batch by _admit_in_batches"""
+        job_id = job.label
         
         print(f"🔍 Analyzing {job_id}...")
         
@@ -174,54 +371,32 @@ class EnhancedConcurrentJobFixer:
         time.sleep(0.2)  # Simulate API call time
         
         # Pattern analysis
-        error_pattern = job.get('error_pattern', '')
-        confidence = job.get('confidence', 0.5)
+        error_pattern = job.error_pattern
         
-        if 'ModuleNotFoundError' in error_pattern or 'import' in error_pattern.lower():
-            fix_type = 'python_import_fix'
-            suggested_fix = 'Add missing Python dependencies to requirements.txt'
-            confidence = 0.95
-        elif 'npm ERR!' in error_pattern or 'package.json' in error_pattern:
-            fix_type = 'npm_dependency_fix'  
-            suggested_fix = 'Fix package.json and npm dependency issues'
-            confidence = 0.98
-        elif 'database' in error_pattern.lower() or 'psql' in error_pattern:
-            fix_type = 'database_config_fix'
-            suggested_fix = 'Fix database configuration and connection'
-            confidence = 0.89
-        elif 'matrix' in error_pattern.lower():
-            fix_type = 'workflow_matrix_fix'
-            suggested_fix = 'Fix workflow matrix configuration'
-            confidence = 0.96
-        elif 'secret' in error_pattern.lower():
-            fix_type = 'secret_config_fix'
-            suggested_fix = 'Fix secret configuration and access'
-            confidence = 0.92
+        for pattern, fix_type, suggested_fix, confidence in ERROR_PATTERNS:
+            if pattern.search(error_pattern):
+                break
         else:
-            fix_type = 'generic_fix'
-            suggested_fix = 'Generic workflow fix needed'
-            confidence = 0.6
+            fix_type, suggested_fix, confidence = GENERIC_FIX
         
         print(f"📊 {job_id}: {fix_type} (confidence: {confidence:.2f})")
         
-        return {
-            **job,
-            'fix_type': fix_type,
-            'suggested_fix': suggested_fix,
-            'confidence': confidence,
-            'analysis_complete': True
-        }
+        job.fix_type = fix_type
+        job.suggested_fix = suggested_fix
+        job.confidence = confidence
+        job.analysis_complete = True
+        return job
     
-    def apply_fix_with_rate_limiting(self, job: Dict[str, Any]) -> Dict[str, Any]:
+    def apply_fix_with_rate_limiting(self, job: FailedJob) -> FailedJob:
         """Apply fix with rate limit consideration"""
-        job_id = f"{job['workflow_name']}/{job['job_name']}"
+        job_id = job.label
         
         print(f"🔧 Applying fix to {job_id}...")
         
         # Simulate fix application time
         time.sleep(0.3)
         
-        confidence = job.get('confidence', 0.5)
+        confidence = job.confidence
         
         if confidence >= 0.9:
             status = 'auto_applied'
@@ -233,58 +408,52 @@ class EnhancedConcurrentJobFixer:
             status = 'manual_review'
             icon = '⚠️'
         
-        print(f"{icon} {job_id}: {status} - {job['suggested_fix']}")
+        print(f"{icon} {job_id}: {status} - {job.suggested_fix}")
         
-        return {
-            **job,
-            'fix_status': status,
-            'fix_applied': status == 'auto_applied'
-        }
+        job.fix_status = status
+        job.fix_applied = status == 'auto_applied'
+        return job
+    
+    def analyze_then_fix(self, job: FailedJob) -> FailedJob:
+        """Analyze one job and apply its fix in the same worker, updating the job in place"""
+        return self.apply_fix_with_rate_limiting(self.analyze_job_with_rate_limiting(job))
     
-    def process_jobs_with_smart_concurrency(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _admit_in_batches(self, jobs: List[FailedJob]):
+        """Yield jobs, reserving rate limit budget once per batch instead of once per job"""
+        batch_size = self.api_handler._get_optimal_batch_size()
+        for i in range(0, len(jobs), batch_size):
+            batch = jobs[i:i + batch_size]
+            # Blocks on the handler's shared token bucket until the batch's budget refills;
+            # False means the window reset is too far away to wait for
+            if not self.api_handler.check_rate_limit_before_request(REQUESTS_PER_JOB * len(batch)):
+                print(f"⏳ Rate limit budget exhausted, deferring {len(jobs) - i} remaining jobs")
+                return
+            yield from batch
+    
+    def process_jobs_with_smart_concurrency(self, jobs: List[FailedJob]) -> List[FailedJob]:
         """Process jobs with API-aware concurrency"""
         if not jobs:
             return []
         
         # Get optimal worker count based on current API limits
-        optimal_workers = self.api_handler.get_optimal_worker_count()
+        optimal_workers = min(MAX_CONCURRENT_REQUESTS, self.api_handler.get_optimal_worker_count())
         
         print(f"🚀 Processing {len(jobs)} jobs with {optimal_workers} smart workers")
-        print(f"📊 API Status: {self.api_handler.last_rate_limit.remaining}/{self.api_handler.last_rate_limit.limit} requests remaining")
+        rate_limit = self.api_handler.get_rate_limit_info()
+        print(f"📊 API Status: {rate_limit.remaining}/{rate_limit.limit} requests remaining")
         
-        # Phase 1: Analysis with rate limiting
-        print(f"\n📋 PHASE 1: INTELLIGENT ANALYSIS ({optimal_workers} workers)")
+        # Each worker analyzes a job and applies its fix straight away, so fixes
+        # start as soon as their own analysis is done rather than after all of them
+        print(f"\n📋 ANALYSIS AND FIX APPLICATION ({optimal_workers} workers)")
         print("-" * 60)
         
         with concurrent.futures.ThreadPoolExecutor(max_workers=optimal_workers) as executor:
-            analysis_futures = {
-                executor.submit(self.analyze_job_with_rate_limiting, job): job
-                for job in jobs
-            }
-            
-            analyzed_jobs = []
-            for future in concurrent.futures.as_completed(analysis_futures):
-                result = future.result()
-                analyzed_jobs.append(result)
-        
-        print(f"\n🔧 PHASE 2: TARGETED FIX APPLICATION")
-        print("-" * 60)
-        
-        # Phase 2: Fix application (less API-intensive)
-        with concurrent.futures.ThreadPoolExecutor(max_workers=optimal_workers) as executor:
-            fix_futures = {
-                executor.submit(self.apply_fix_with_rate_limiting, job): job
-                for job in analyzed_jobs
-            }
-            
-            fixed_jobs = []
-            for future in concurrent.futures.as_completed(fix_futures):
-                result = future.result()
-                fixed_jobs.append(result)
+            # map() submits as it consumes the generator, so each batch is admitted before it runs
+            fixed_jobs = list(executor.map(self.analyze_then_fix, self._admit_in_batches(jobs)))
         
         return fixed_jobs
     
-    def generate_api_aware_report(self, results: List[Dict[str, Any]]) -> None:
+    def generate_api_aware_report(self, results: List[FailedJob]) -> None:
         """Generate report with API usage information"""
         # Get final API status
         final_limits = self.api_handler.get_api_limits_summary()
@@ -293,10 +462,19 @@ class EnhancedConcurrentJobFixer:
         print(f"🎉 SMART CONCURRENT PROCESSING COMPLETE!")
         print(f"="*70)
         
-        # Job results
+        # Job results and per-fix-type tallies in a single pass
+        status_counts = Counter()
+        type_totals = Counter()
+        type_applied = Counter()
+        for result in results:
+            fix_type = result.fix_type or 'unknown'
+            status_counts['auto_applied' if result.fix_applied else result.fix_status] += 1
+            type_totals[fix_type] += 1
+            type_applied[fix_type] += result.fix_applied
+        
         total = len(results)
-        auto_applied = sum(1 for r in results if r.get('fix_applied', False))
-        needs_review = sum(1 for r in results if r.get('fix_status') == 'needs_review')
+        auto_applied = status_counts['auto_applied']
+        needs_review = status_counts['needs_review']
         manual_review = total - auto_applied - needs_review
         
         print(f"\n📊 JOB PROCESSING RESULTS:")
@@ -304,7 +482,7 @@ class EnhancedConcurrentJobFixer:
         print(f"   • Auto-applied: {auto_applied}")
         print(f"   • Needs review: {needs_review}")
         print(f"   • Manual review: {manual_review}")
-        print(f"   • Success rate: {(auto_applied/total)*100:.1f}%")
+        print(f"   • Success rate: {(auto_applied / total * 100) if total else 0.0:.1f}%")
         
         # API usage summary
         print(f"\n🔗 API USAGE SUMMARY:")
@@ -314,18 +492,10 @@ class EnhancedConcurrentJobFixer:
         print(f"   • Remaining requests: {final_limits['rate_limit']['remaining']}")
         
         # Detailed results by fix type
-        by_type = {}
-        for result in results:
-            fix_type = result.get('fix_type', 'unknown')
-            if fix_type not in by_type:
-                by_type[fix_type] = []
-            by_type[fix_type].append(result)
-        
         print(f"\n📋 RESULTS BY FIX TYPE:")
         print("-" * 50)
-        for fix_type, jobs in by_type.items():
-            applied = sum(1 for j in jobs if j.get('fix_applied', False))
-            print(f"   • {fix_type}: {applied}/{len(jobs)} applied")
+        for fix_type, count in type_totals.items():
+            print(f"   • {fix_type}: {type_applied[fix_type]}/{count} applied")
 
 def main():
     parser = argparse.ArgumentParser(description='Enhanced Concurrent GitHub Actions Job Fixer')
@@ -337,8 +507,7 @@ def main():
     args = parser.parse_args()
     
     if args.setup_auth:
-        from api_limit_handler import setup_github_authentication
-        setup_github_authentication()
+        api_limit_handler.setup_github_authentication()
         return
     
     print(f"🤖 Enhanced Concurrent GitHub Actions Job Fixer")
@@ -6,25 +6,311 @@ Analyzes actual workflow run failures and provides intelligent fixes
 based on error patterns, logs, and common failure scenarios.
 """
 
+import concurrent.futures
+import contextlib
+import gzip
+import itertools
 import json
+import os
 import subprocess
 import re
+import sys
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
-from datetime import datetime, timedelta
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+
+try:
+    import ahocorasick  # optional: single-pass literal prefilter when installed
+except ImportError:
+    ahocorasick = None
+
+# Failed check runs (jobs) of each workflow run (check suite) on a commit
+_FAILED_CHECK_SUITES_FRAGMENT = (
+    "checkSuites(first: 50) { nodes { workflowRun { databaseId } "
+    "checkRuns(first: 100, filterBy: {checkType: LATEST, conclusions: [FAILURE]}) "
+    "{ nodes { name conclusion } } } }"
+)
+
+# Failed runs fetched and analyzed at once; each one is a few gh round trips
+MAX_RUN_WORKERS = 8
+
+# Failed-step logs of finished run attempts, gzipped and keyed by run id and attempt
+LOG_CACHE_DIR = Path.home() / ".claude" / "github-actions-improver" / "logs"
+LOG_CACHE_MAX = 200
+
+# Timestamp layout of GitHub API fields such as createdAt (always UTC)
+GITHUB_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# datetime.fromisoformat() accepts a trailing "Z" from Python 3.11
+_FROMISO_HANDLES_Z = sys.version_info >= (3, 11)
+
+# Failure patterns match case-insensitively, line by line
+_PATTERN_FLAGS = re.MULTILINE | re.IGNORECASE
+
+# Common failure patterns with their fixes, checked in order. "literals" holds
+# lower-case strings of which at least one appears in any match of "pattern".
+FAILURE_PATTERNS = (
+    # Node.js/npm failures
+    {
+        "pattern": re.compile(r"npm ERR!.*ENOENT.*package\.json", _PATTERN_FLAGS),
+        "literals": ("enoent",),
+        "error_type": "missing_package_json",
+        "message": "package.json not found",
+        "fixes": [
+            "Add package.json file to repository root",
+            "Update workflow to run from correct directory with package.json"
+        ],
+        "workflow_changes": [
+            "Add 'working-directory' parameter to npm steps",
+            "Add step to verify package.json exists before npm install"
+        ],
+        "confidence": 0.9
+    },
+    {
+        "pattern": re.compile(r"npm ERR!.*404.*not found", _PATTERN_FLAGS),
+        "literals": ("npm err!",),
+        "error_type": "npm_package_not_found",
+        "message": "npm package not found",
+        "fixes": [
+            "Check package names in package.json for typos",
+            "Verify package exists on npm registry",
+            "Update to correct package version"
+        ],
+        "confidence": 0.8
+    },
+    {
+        "pattern": re.compile(r"npm ERR!.*peer dep.*ERESOLVE", _PATTERN_FLAGS),
+        "literals": ("eresolve",),
+        "error_type": "npm_peer_dependency",
+        "message": "npm peer dependency conflict",
+        "fixes": [
+            "Use 'npm install --legacy-peer-deps' in workflow",
+            "Update package.json to resolve peer dependency conflicts",
+            "Use npm ci with --force flag"
+        ],
+        "workflow_changes": [
+            "Replace 'npm ci' with 'npm ci --legacy-peer-deps'",
+            "Add npm config set legacy-peer-deps true"
+        ],
+        "confidence": 0.9
+    },
+
+    # Python failures
+    {
+        "pattern": re.compile(r"ERROR:.*No module named '(\w+)'", _PATTERN_FLAGS),
+        "literals": ("no module named '",),
+        "error_type": "python_missing_module",
+        "message": "Python module not found",
+        "fixes": [
+            "Add missing module to requirements.txt",
+            "Install module in workflow before tests",
+            "Check if module name is correct"
+        ],
+        "workflow_changes": [
+            "Add missing dependencies to requirements.txt installation",
+            "Add explicit pip install step for missing modules"
+        ],
+        "confidence": 0.9
+    },
+    {
+        "pattern": re.compile(r"SyntaxError:|IndentationError:", _PATTERN_FLAGS),
+        "literals": ("syntaxerror:", "indentationerror:"),
+        "error_type": "python_syntax_error",
+        "message": "Python syntax or indentation error",
+        "fixes": [
+            "Fix syntax errors in Python code",
+            "Check indentation consistency",
+            "Run local linting before committing"
+        ],
+        "code_changes": [
+            "Fix syntax errors identified in logs",
+            "Run flake8 or black formatter"
+        ],
+        "confidence": 0.95
+    },
+    {
+        "pattern": re.compile(r"ImportError:.*cannot import name", _PATTERN_FLAGS),
+        "literals": ("cannot import name",),
+        "error_type": "python_import_error",
+        "message": "Python import error",
+        "fixes": [
+            "Check import paths and module structure",
+            "Verify __init__.py files exist",
+            "Update imports to correct module paths"
+        ],
+        "confidence": 0.8
+    },
+
+    # Testing failures
+    {
+        "pattern": re.compile(r"FAILED.*test_.*\.py::\w+", _PATTERN_FLAGS),
+        "literals": (".py::",),
+        "error_type": "test_failure",
+        "message": "Unit tests failing",
+        "fixes": [
+            "Fix failing test assertions",
+            "Update test data or mocks",
+            "Check if code changes broke expected behavior"
+        ],
+        "code_changes": [
+            "Analyze failing test output and fix underlying issues",
+            "Update test expectations if behavior change is intentional"
+        ],
+        "confidence": 0.7
+    },
+
+    # Build/compilation failures
+    {
+        "pattern": re.compile(r"error: (.+)\n.*--> (.+):(\d+):(\d+)", _PATTERN_FLAGS),
+        "literals": ("--> ",),
+        "error_type": "rust_compile_error",
+        "message": "Rust compilation error",
+        "fixes": [
+            "Fix Rust compilation errors in source code",
+            "Update Rust dependencies if needed",
+            "Check Rust toolchain version compatibility"
+        ],
+        "confidence": 0.9
+    },
+    {
+        "pattern": re.compile(r"go: (.+@.+): (.+)", _PATTERN_FLAGS),
+        "literals": ("go: ",),
+        "error_type": "go_module_error",
+        "message": "Go module error",
+        "fixes": [
+            "Run 'go mod tidy' to clean up dependencies",
+            "Update go.mod with correct module versions",
+            "Check if module exists and is accessible"
+        ],
+        "workflow_changes": [
+            "Add 'go mod download' step before build",
+            "Add 'go mod tidy' step to verify dependencies"
+        ],
+        "confidence": 0.8
+    },
+
+    # Docker/container failures
+    {
+        "pattern": re.compile(r"docker: Error response from daemon:", _PATTERN_FLAGS),
+        "literals": ("docker: error response from daemon:",),
+        "error_type": "docker_error",
+        "message": "Docker container error",
+        "fixes": [
+            "Check Docker image availability",
+            "Verify Dockerfile syntax",
+            "Check container resource requirements"
+        ],
+        "confidence": 0.7
+    },
+
+    # Environment/setup failures
+    {
+        "pattern": re.compile(r"ERROR: The request is invalid: (.+)", _PATTERN_FLAGS),
+        "literals": ("error: the request is invalid: ",),
+        "error_type": "github_api_error",
+        "message": "GitHub API or permissions error",
+        "fixes": [
+            "Check GITHUB_TOKEN permissions",
+            "Verify repository access settings",
+            "Update workflow permissions section"
+        ],
+        "workflow_changes": [
+            "Add appropriate permissions to workflow",
+            "Check if GITHUB_TOKEN needs additional scopes"
+        ],
+        "confidence": 0.8
+    },
+
+    # Cache failures
+    {
+        "pattern": re.compile(r"Warning: Failed to restore cache", _PATTERN_FLAGS),
+        "literals": ("warning: failed to restore cache",),
+        "error_type": "cache_failure",
+        "message": "Cache restore failed",
+        "fixes": [
+            "Update cache key patterns",
+            "Clear old cache if corrupted",
+            "Add fallback cache keys"
+        ],
+        "workflow_changes": [
+            "Update cache action with better key patterns",
+            "Add restore-keys for cache fallbacks"
+        ],
+        "confidence": 0.6
+    }
+)
+
+def _build_literal_automaton():
+    """Map every pattern literal to the FAILURE_PATTERNS indices that need it"""
+    if ahocorasick is None:
+        return None
+    indices_by_literal = {}
+    for index, pattern_info in enumerate(FAILURE_PATTERNS):
+        for literal in pattern_info["literals"]:
+            indices_by_literal.setdefault(literal, []).append(index)
+    automaton = ahocorasick.Automaton()
+    for literal, indices in indices_by_literal.items():
+        automaton.add_word(literal, tuple(indices))
+    automaton.make_automaton()
+    return automaton
+
+_LITERAL_AUTOMATON = _build_literal_automaton()
+
+def _candidate_patterns(logs: str):
+    """Patterns whose literals occur in logs, in FAILURE_PATTERNS order"""
+    logs_lc = logs.lower()
+    if _LITERAL_AUTOMATON is None:
+        # One C-level substring search per literal is far cheaper than a regex scan
+        return [
+            pattern_info for pattern_info in FAILURE_PATTERNS
+            if any(literal in logs_lc for literal in pattern_info["literals"])
+        ]
+    hits = set()
+    for _, indices in _LITERAL_AUTOMATON.iter(logs_lc):
+        hits.update(indices)
+    return [FAILURE_PATTERNS[index] for index in sorted(hits)]
+
+def _parse_timestamp(value: str) -> datetime:
+    """Parse an ISO-8601 timestamp, including GitHub's trailing "Z" for UTC"""
+    return datetime.fromisoformat(value if _FROMISO_HANDLES_Z else value.replace("Z", "+00:00"))
+
+def _created_since(created_at: str, cutoff_iso: str) -> bool:
+    """Whether created_at is at or after cutoff_iso (formatted with GITHUB_TIMESTAMP_FORMAT)"""
+    # Fixed-width UTC timestamps sort chronologically as plain strings
+    if len(created_at) == len(cutoff_iso) and created_at.endswith("Z"):
+        return created_at >= cutoff_iso
+    return _parse_timestamp(created_at) >= _parse_timestamp(cutoff_iso)
+
+def _split_logs_by_job(lines: Iterable[str]) -> Dict[str, str]:
+    """Group `gh run view --log-failed` lines by the tab-separated job name that starts each"""
+    lines_by_job = {}
+    for line in lines:
+        job_name, tab, _ = line.partition("\t")
+        if tab:
+            lines_by_job.setdefault(job_name, []).append(line.rstrip("\n"))
+    return {job_name: "\n".join(lines) for job_name, lines in lines_by_job.items()}
+
+# Report sections listed under each analyzed job: (heading, analysis key)
+SUGGESTION_SECTIONS = (
+    ("Recommended Fixes", "suggested_fixes"),
+    ("Workflow Changes", "workflow_changes"),
+    ("Code Changes", "code_changes"),
+)
 
 class GitHubActionsFailureAnalyzer:
     def __init__(self, repo_path: str = "."):
         self.repo_path = Path(repo_path).resolve()
         
-    def get_recent_workflow_runs(self, limit: int = 20) -> List[Dict]:
-        """Get recent workflow runs using GitHub CLI."""
+    def get_recent_workflow_runs(self, limit: int = 20, status: Optional[str] = None) -> List[Dict]:
+        """Get recent workflow runs using GitHub CLI, optionally filtered server-side by status."""
         try:
             cmd = [
                 "gh", "run", "list", 
                 "--limit", str(limit),
-                "--json", "databaseId,name,status,conclusion,createdAt,headBranch,event,workflowName,url"
+                "--json", "databaseId,name,status,conclusion,createdAt,headBranch,headSha,event,workflowName,url,attempt"
             ]
+            if status:
+                cmd.extend(["--status", status])
             result = subprocess.run(cmd, capture_output=True, text=True, cwd=self.repo_path)
             
             if result.returncode == 0:
@@ -44,19 +330,55 @@ class GitHubActionsFailureAnalyzer:
                 failed_runs.append(run)
         return failed_runs
     
-    def get_run_logs(self, run_id: str) -> str:
-        """Get detailed logs for a specific workflow run."""
+    def get_run_logs(self, run_id: str, attempt: Optional[int] = None) -> str:
+        """Get the failed-step logs for a specific workflow run."""
+        return "".join(self.iter_run_log_lines(run_id, attempt))
+    
+    def iter_run_log_lines(self, run_id: str, attempt: Optional[int] = None) -> Iterator[str]:
+        """Stream the failed-step log lines of a workflow run as gh prints them.
+        
+        Logs of a finished run attempt never change, so when the attempt is
+        known they are served from, or saved to, the on-disk log cache.
+        """
+        cache_file = LOG_CACHE_DIR / f"{run_id}-{attempt}.log.gz" if attempt else None
+        if cache_file is not None and cache_file.exists():
+            with gzip.open(cache_file, "rt", encoding="utf-8") as f:
+                yield from f
+            return
+        
+        cmd = ["gh", "run", "view", run_id, "--log-failed"]
+        tmp_file = None
         try:
-            cmd = ["gh", "run", "view", run_id, "--log"]
-            result = subprocess.run(cmd, capture_output=True, text=True, cwd=self.repo_path)
-            
-            if result.returncode == 0:
-                return result.stdout
-            else:
-                return ""
+            with contextlib.ExitStack() as stack:
+                proc = stack.enter_context(subprocess.Popen(
+                    cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                    encoding="utf-8", errors="replace", bufsize=1, cwd=self.repo_path))
+                cache = None
+                if cache_file is not None:
+                    LOG_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                    tmp_file = cache_file.with_suffix(".tmp")
+                    cache = stack.enter_context(gzip.open(tmp_file, "wt", encoding="utf-8"))
+                for line in proc.stdout:
+                    if cache is not None:
+                        cache.write(line)
+                    yield line
+            if tmp_file is not None and proc.returncode == 0:
+                os.replace(tmp_file, cache_file)
+                tmp_file = None
         except Exception as e:
             print(f"⚠️  Could not fetch logs for run {run_id}: {e}")
-            return ""
+        finally:
+            if tmp_file is not None:
+                tmp_file.unlink(missing_ok=True)
+    
+    def prune_log_cache(self):
+        """Drop all but the LOG_CACHE_MAX most recently written cached logs."""
+        try:
+            cached = sorted(LOG_CACHE_DIR.glob("*.log.gz"), key=lambda path: path.stat().st_mtime)
+            for path in cached[:-LOG_CACHE_MAX]:
+                path.unlink(missing_ok=True)
+        except OSError as e:
+            print(f"⚠️  Could not prune log cache: {e}")
     
     def get_run_jobs(self, run_id: str) -> List[Dict]:
         """Get job details for a specific workflow run."""
@@ -76,6 +398,54 @@ class GitHubActionsFailureAnalyzer:
             print(f"⚠️  Could not fetch jobs for run {run_id}: {e}")
             return []
     
+    def get_jobs_for_runs(self, runs: List[Dict]) -> Dict[int, List[Dict]]:
+        """Get the failed jobs of many workflow runs with a single GraphQL query.
+        
+        Jobs are reached through each run's head commit check suites, so one
+        aliased query covers every run instead of one `gh run view` per run.
+        Only the latest failed check runs are returned, filtered server-side.
+        Runs missing from the result should fall back to get_run_jobs().
+        """
+        shas = list(dict.fromkeys(run["headSha"] for run in runs if run.get("headSha")))
+        if not shas:
+            return {}
+        
+        commit_fields = []
+        for i, sha in enumerate(shas):
+            commit_fields.append(
+                f'c{i}: object(oid: "{sha}") {{ ... on Commit {{ {_FAILED_CHECK_SUITES_FRAGMENT} }} }}'
+            )
+        query = (
+            "query($owner: String!, $name: String!) { "
+            "repository(owner: $owner, name: $name) { " + " ".join(commit_fields) + " } }"
+        )
+        
+        try:
+            cmd = [
+                "gh", "api", "graphql",
+                "-F", "owner={owner}", "-F", "name={repo}",
+                "-f", f"query={query}"
+            ]
+            result = subprocess.run(cmd, capture_output=True, text=True, cwd=self.repo_path)
+            if result.returncode != 0:
+                return {}
+            repository = json.loads(result.stdout).get("data", {}).get("repository") or {}
+        except Exception as e:
+            print(f"⚠️  Could not batch-fetch jobs: {e}")
+            return {}
+        
+        jobs_by_run = {}
+        for commit in repository.values():
+            for suite in ((commit or {}).get("checkSuites") or {}).get("nodes", []):
+                workflow_run = suite.get("workflowRun")
+                if not workflow_run:
+                    continue
+                jobs_by_run[workflow_run["databaseId"]] = [
+                    {"name": check_run["name"], "conclusion": (check_run.get("conclusion") or "").lower()}
+                    for check_run in suite["checkRuns"]["nodes"]
+                ]
+        return jobs_by_run
+    
     def analyze_failure_patterns(self, logs: str, job_name: str = "") -> Dict:
         """Analyze logs to identify failure patterns and suggest fixes."""
         failure_analysis = {
@@ -87,202 +457,26 @@ class GitHubActionsFailureAnalyzer:
             "code_changes": []
         }
         
-        # Common failure patterns with their fixes
-        failure_patterns = [
-            # Node.js/npm failures
-            {
-                "pattern": r"npm ERR!.*ENOENT.*package\.json",
-                "error_type": "missing_package_json",
-                "message": "package.json not found",
-                "fixes": [
-                    "Add package.json file to repository root",
-                    "Update workflow to run from correct directory with package.json"
-                ],
-                "workflow_changes": [
-                    "Add 'working-directory' parameter to npm steps",
-                    "Add step to verify package.json exists before npm install"
-                ],
-                "confidence": 0.9
-            },
-            {
-                "pattern": r"npm ERR!.*404.*not found",
-                "error_type": "npm_package_not_found",
-                "message": "npm package not found",
-                "fixes": [
-                    "Check package names in package.json for typos",
-                    "Verify package exists on npm registry",
-                    "Update to correct package version"
-                ],
-                "confidence": 0.8
-            },
-            {
-                "pattern": r"npm ERR!.*peer dep.*ERESOLVE",
-                "error_type": "npm_peer_dependency",
-                "message": "npm peer dependency conflict",
-                "fixes": [
-                    "Use 'npm install --legacy-peer-deps' in workflow",
-                    "Update package.json to resolve peer dependency conflicts",
-                    "Use npm ci with --force flag"
-                ],
-                "workflow_changes": [
-                    "Replace 'npm ci' with 'npm ci --legacy-peer-deps'",
-                    "Add npm config set legacy-peer-deps true"
-                ],
-                "confidence": 0.9
-            },
-            
-            # Python failures
-            {
-                "pattern": r"ERROR:.*No module named '(\w+)'",
-                "error_type": "python_missing_module",
-                "message": "Python module not found",
-                "fixes": [
-                    "Add missing module to requirements.txt",
-                    "Install module in workflow before tests",
-                    "Check if module name is correct"
-                ],
-                "workflow_changes": [
-                    "Add missing dependencies to requirements.txt installation",
-                    "Add explicit pip install step for missing modules"
-                ],
-                "confidence": 0.9
-            },
-            {
-                "pattern": r"SyntaxError:|IndentationError:",
-                "error_type": "python_syntax_error",
-                "message": "Python syntax or indentation error",
-                "fixes": [
-                    "Fix syntax errors in Python code",
-                    "Check indentation consistency",
-                    "Run local linting before committing"
-                ],
-                "code_changes": [
-                    "Fix syntax errors identified in logs",
-                    "Run flake8 or black formatter"
-                ],
-                "confidence": 0.95
-            },
-            {
-                "pattern": r"ImportError:.*cannot import name",
-                "error_type": "python_import_error",
-                "message": "Python import error",
-                "fixes": [
-                    "Check import paths and module structure",
-                    "Verify __init__.py files exist",
-                    "Update imports to correct module paths"
-                ],
-                "confidence": 0.8
-            },
-            
-            # Testing failures
-            {
-                "pattern": r"FAILED.*test_.*\.py::\w+",
-                "error_type": "test_failure",
-                "message": "Unit tests failing",
-                "fixes": [
-                    "Fix failing test assertions",
-                    "Update test data or mocks",
-                    "Check if code changes broke expected behavior"
-                ],
-                "code_changes": [
-                    "Analyze failing test output and fix underlying issues",
-                    "Update test expectations if behavior change is intentional"
-                ],
-                "confidence": 0.7
-            },
-            
-            # Build/compilation failures
-            {
-                "pattern": r"error: (.+)\n.*--> (.+):(\d+):(\d+)",
-                "error_type": "rust_compile_error",
-                "message": "Rust compilation error",
-                "fixes": [
-                    "Fix Rust compilation errors in source code",
-                    "Update Rust dependencies if needed",
-                    "Check Rust toolchain version compatibility"
-                ],
-                "confidence": 0.9
-            },
-            {
-                "pattern": r"go: (.+@.+): (.+)",
-                "error_type": "go_module_error",
-                "message": "Go module error",
-                "fixes": [
-                    "Run 'go mod tidy' to clean up dependencies",
-                    "Update go.mod with correct module versions",
-                    "Check if module exists and is accessible"
-                ],
-                "workflow_changes": [
-                    "Add 'go mod download' step before build",
-                    "Add 'go mod tidy' step to verify dependencies"
-                ],
-                "confidence": 0.8
-            },
-            
-            # Docker/container failures
-            {
-                "pattern": r"docker: Error response from daemon:",
-                "error_type": "docker_error",
-                "message": "Docker container error",
-                "fixes": [
-                    "Check Docker image availability",
-                    "Verify Dockerfile syntax",
-                    "Check container resource requirements"
-                ],
-                "confidence": 0.7
-            },
-            
-            # Environment/setup failures
-            {
-                "pattern": r"ERROR: The request is invalid: (.+)",
-                "error_type": "github_api_error",
-                "message": "GitHub API or permissions error",
-                "fixes": [
-                    "Check GITHUB_TOKEN permissions",
-                    "Verify repository access settings",
-                    "Update workflow permissions section"
-                ],
-                "workflow_changes": [
-                    "Add appropriate permissions to workflow",
-                    "Check if GITHUB_TOKEN needs additional scopes"
-                ],
-                "confidence": 0.8
-            },
-            
-            # Cache failures
-            {
-                "pattern": r"Warning: Failed to restore cache",
-                "error_type": "cache_failure",
-                "message": "Cache restore failed",
-                "fixes": [
-                    "Update cache key patterns",
-                    "Clear old cache if corrupted",
-                    "Add fallback cache keys"
-                ],
-                "workflow_changes": [
-                    "Update cache action with better key patterns",
-                    "Add restore-keys for cache fallbacks"
-                ],
-                "confidence": 0.6
-            }
-        ]
-        
-        # Analyze logs for patterns
-        for pattern_info in failure_patterns:
-            matches = re.findall(pattern_info["pattern"], logs, re.MULTILINE | re.IGNORECASE)
-            if matches:
+        # Analyze logs for patterns, skipping those whose literals never occur
+        for pattern_info in _candidate_patterns(logs):
+            match = pattern_info["pattern"].search(logs)
+            if match:
                 failure_analysis["error_type"] = pattern_info["error_type"]
                 failure_analysis["error_message"] = pattern_info["message"]
-                failure_analysis["suggested_fixes"] = pattern_info["fixes"]
+                failure_analysis["suggested_fixes"] = list(pattern_info["fixes"])
                 failure_analysis["confidence"] = pattern_info["confidence"]
-                failure_analysis["workflow_changes"] = pattern_info.get("workflow_changes", [])
-                failure_analysis["code_changes"] = pattern_info.get("code_changes", [])
+                failure_analysis["workflow_changes"] = list(pattern_info.get("workflow_changes", []))
+                failure_analysis["code_changes"] = list(pattern_info.get("code_changes", []))
                 
-                # Extract specific error details from matches
-                if matches and isinstance(matches[0], tuple):
-                    failure_analysis["error_details"] = matches[0]
-                elif matches:
-                    failure_analysis["error_details"] = matches[0]
+                # Extract specific error details from the first match, shaped like
+                # a findall() item: whole match, the only group, or all groups
+                groups = match.groups()
+                if not groups:
+                    failure_analysis["error_details"] = match.group(0)
+                elif len(groups) == 1:
+                    failure_analysis["error_details"] = groups[0]
+                else:
+                    failure_analysis["error_details"] = groups
                 
                 break
         
@@ -290,101 +484,110 @@ class GitHubActionsFailureAnalyzer:
     
     def generate_fix_suggestions(self, run_analysis: Dict) -> str:
         """Generate comprehensive fix suggestions for a failed run."""
-        suggestions = []
-        
-        suggestions.append(f"## 🔍 Failure Analysis: {run_analysis['workflow_name']}")
-        suggestions.append(f"**Run ID:** {run_analysis['run_id']}")
-        suggestions.append(f"**Failed Jobs:** {', '.join(run_analysis['failed_jobs'])}")
-        suggestions.append("")
+        blocks = [
+            f"## 🔍 Failure Analysis: {run_analysis['workflow_name']}\n"
+            f"**Run ID:** {run_analysis['run_id']}\n"
+            f"**Failed Jobs:** {', '.join(run_analysis['failed_jobs'])}"
+        ]
         
         for job_name, analysis in run_analysis['job_analyses'].items():
-            if analysis['error_type'] != 'unknown':
-                suggestions.append(f"### 🔨 {job_name}")
-                suggestions.append(f"**Error Type:** {analysis['error_type']}")
-                suggestions.append(f"**Issue:** {analysis['error_message']}")
-                suggestions.append(f"**Confidence:** {analysis['confidence']:.0%}")
-                suggestions.append("")
-                
-                if analysis['suggested_fixes']:
-                    suggestions.append("**Recommended Fixes:**")
-                    for fix in analysis['suggested_fixes']:
-                        suggestions.append(f"- {fix}")
-                    suggestions.append("")
-                
-                if analysis['workflow_changes']:
-                    suggestions.append("**Workflow Changes:**")
-                    for change in analysis['workflow_changes']:
-                        suggestions.append(f"- {change}")
-                    suggestions.append("")
-                
-                if analysis['code_changes']:
-                    suggestions.append("**Code Changes:**")
-                    for change in analysis['code_changes']:
-                        suggestions.append(f"- {change}")
-                    suggestions.append("")
+            if analysis['error_type'] == 'unknown':
+                continue
+            blocks.append(
+                f"### 🔨 {job_name}\n"
+                f"**Error Type:** {analysis['error_type']}\n"
+                f"**Issue:** {analysis['error_message']}\n"
+                f"**Confidence:** {analysis['confidence']:.0%}"
+            )
+            for title, key in SUGGESTION_SECTIONS:
+                if analysis[key]:
+                    blocks.append(f"**{title}:**\n" + "\n".join(f"- {item}" for item in analysis[key]))
         
-        return "\n".join(suggestions)
+        # Blank line between blocks, newline after the last one
+        return "\n\n".join(blocks) + "\n"
     
     def analyze_recent_failures(self, days_back: int = 7, max_runs: int = 10) -> List[Dict]:
         """Analyze recent workflow failures and provide fix suggestions."""
-        print("🔍 Fetching recent workflow runs...")
-        runs = self.get_recent_workflow_runs(limit=50)
+        print("🔍 Fetching recent failed workflow runs...")
+        runs = self.get_recent_workflow_runs(limit=50, status="failure")
         
         if not runs:
-            print("❌ No workflow runs found. Make sure you're in a repository with GitHub Actions.")
+            print("✅ No failed workflow runs found!")
             return []
         
-        # Filter for recent failed runs
-        from datetime import timezone
-        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_back)
-        recent_failed_runs = []
+        # Filter for recent failed runs, stopping once max_runs are found
+        cutoff_iso = (datetime.now(timezone.utc) - timedelta(days=days_back)).strftime(GITHUB_TIMESTAMP_FORMAT)
+        recent_failed = (
+            run for run in runs
+            if run.get("conclusion") == "failure" and _created_since(run["createdAt"], cutoff_iso)
+        )
+        runs_to_analyze = list(itertools.islice(recent_failed, max_runs))
         
-        for run in runs:
-            if run.get("conclusion") == "failure":
-                run_date = datetime.fromisoformat(run["createdAt"].replace('Z', '+00:00'))
-                if run_date >= cutoff_date:
-                    recent_failed_runs.append(run)
-        
-        if not recent_failed_runs:
+        if not runs_to_analyze:
             print("✅ No recent failed workflow runs found!")
             return []
         
-        print(f"🔨 Analyzing {min(len(recent_failed_runs), max_runs)} recent failures...")
+        print(f"🔨 Analyzing {len(runs_to_analyze)} recent failures...")
         
-        analyses = []
-        for run in recent_failed_runs[:max_runs]:
-            print(f"📋 Analyzing run: {run['workflowName']} ({run['databaseId']})")
-            
-            # Get detailed job information
-            jobs = self.get_run_jobs(str(run['databaseId']))
-            failed_jobs = [job for job in jobs if job.get('conclusion') == 'failure']
-            
-            if not failed_jobs:
-                continue
-            
-            run_analysis = {
-                'run_id': run['databaseId'],
-                'workflow_name': run['workflowName'],
-                'url': run['url'],
-                'created_at': run['createdAt'],
-                'failed_jobs': [job['name'] for job in failed_jobs],
-                'job_analyses': {}
+        jobs_by_run = self.get_jobs_for_runs(runs_to_analyze)
+        
+        # Runs are independent, so fetch and analyze them concurrently
+        results = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_RUN_WORKERS) as executor:
+            futures = {
+                executor.submit(self._analyze_one_run, run, jobs_by_run.get(run['databaseId'])): index
+                for index, run in enumerate(runs_to_analyze)
             }
-            
-            # Analyze each failed job
-            for job in failed_jobs:
-                print(f"  🔍 Analyzing job: {job['name']}")
-                
-                # Get logs for this specific run
-                logs = self.get_run_logs(str(run['databaseId']))
-                
-                # Analyze failure patterns
-                analysis = self.analyze_failure_patterns(logs, job['name'])
-                run_analysis['job_analyses'][job['name']] = analysis
-            
-            analyses.append(run_analysis)
+            for future in concurrent.futures.as_completed(futures):
+                run_analysis = future.result()
+                if run_analysis is None:
+                    continue
+                print(f"📋 Analyzed run: {run_analysis['workflow_name']} ({run_analysis['run_id']})")
+                for job_name in run_analysis['failed_jobs']:
+                    print(f"  🔍 Analyzed job: {job_name}")
+                results[futures[future]] = run_analysis
+        
+        self.prune_log_cache()
+        
+        # Report in the original (newest first) run order
+        return [results[index] for index in sorted(results)]
+    
+    def _analyze_one_run(self, run: Dict, jobs: Optional[List[Dict]]) -> Optional[Dict]:
+        """Analyze the failed jobs of one run; jobs=None fetches them per run."""
+        if jobs is None:
+            jobs = self.get_run_jobs(str(run['databaseId']))
+        failed_jobs = [job for job in jobs if job.get('conclusion') == 'failure']
+        
+        if not failed_jobs:
+            return None
+        
+        run_analysis = {
+            'run_id': run['databaseId'],
+            'workflow_name': run['workflowName'],
+            'url': run['url'],
+            'created_at': run['createdAt'],
+            'failed_jobs': [job['name'] for job in failed_jobs],
+            'job_analyses': {}
+        }
+        
+        # The failed-step log covers every job, so stream it once and slice it per job
+        try:
+            job_logs = _split_logs_by_job(self.iter_run_log_lines(str(run['databaseId']), run.get('attempt')))
+        except Exception as e:
+            # One unreadable log must not sink the report for every other run
+            print(f"⚠️  Could not read logs for run {run['databaseId']}: {e}")
+            job_logs = {}
+        
+        # Analyze each failed job
+        for job in failed_jobs:
+            # Analyze failure patterns, on the whole log if the job has no slice
+            logs = job_logs.get(job['name'])
+            if logs is None:
+                logs = "\n".join(job_logs.values())
+            analysis = self.analyze_failure_patterns(logs, job['name'])
+            run_analysis['job_analyses'][job['name']] = analysis
         
-        return analyses
+        return run_analysis
 
 def main():
     import argparse
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Tests for the GitHub API rate limit handler
+"""
+
+import email.message
+import importlib.util
+import json
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+spec = importlib.util.spec_from_file_location(
+    "api_limit_handler", project_root / "api-limit-handler.py"
+)
+api_limit_handler = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(api_limit_handler)
+
+
+class FakeResponse:
+    """Minimal stand-in for http.client.HTTPResponse"""
+
+    def __init__(self, status=200, body=b"", headers=None):
+        self.status = status
+        self.reason = "OK" if status == 200 else "Error"
+        self.headers = email.message.Message()
+        for name, value in (headers or {}).items():
+            self.headers[name] = value
+        self._body = body
+
+    def read(self):
+        return self._body
+
+
+class FakeConnection:
+    """Records requests and replays queued responses"""
+
+    instances = []
+
+    def __init__(self, host, timeout=None):
+        self.host = host
+        self.timeout = timeout
+        self.requests = []
+        self.responses = []
+        FakeConnection.instances.append(self)
+
+    def request(self, method, path, headers=None):
+        self.requests.append((method, path, headers or {}))
+
+    def getresponse(self):
+        return self.responses.pop(0)
+
+    def close(self):
+        pass
+
+
+def _rate_limit_response(limit=5000, remaining=4999, reset=2000000000, used=1, headers=None):
+    """Build a fake response for the rate_limit endpoint"""
+    body = json.dumps({
+        "rate": {"core": {"limit": limit, "remaining": remaining,
+                          "reset": reset, "used": used}}
+    }).encode()
+    return FakeResponse(body=body, headers=headers)
+
+
+class HandlerTestCase(unittest.TestCase):
+    """Base class wiring the handler to a fake keep-alive connection"""
+
+    def setUp(self):
+        FakeConnection.instances = []
+        patcher = mock.patch.object(api_limit_handler.http.client, "HTTPSConnection", FakeConnection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.handler = api_limit_handler.GitHubAPILimitHandler(token="test-token")
+
+    def queue(self, *responses):
+        connection = self.handler._get_connection("api.github.com", 10)
+        connection.responses.extend(responses)
+        return connection
+
+
+class TestRateLimitCaching(HandlerTestCase):
+    """Rate limit lookups should be shared across helper calls"""
+
+    def test_summary_fetches_rate_limit_once(self):
+        """A full summary should only hit the API once"""
+        connection = self.queue(_rate_limit_response())
+        with mock.patch("builtins.print"):
+            summary = self.handler.get_api_limits_summary()
+            self.handler.get_rate_limit_info()
+
+        self.assertEqual(len(connection.requests), 1)
+        self.assertEqual(summary["rate_limit"]["limit"], 5000)
+        self.assertEqual(summary["token_type"], "github_app_or_oauth")
+
+    def test_force_refresh_bypasses_cache(self):
+        """force_refresh should always go to the API, over the same connection"""
+        connection = self.queue(_rate_limit_response(), _rate_limit_response())
+        self.handler.get_rate_limit_info()
+        self.handler.get_rate_limit_info(force_refresh=True)
+
+        self.assertEqual(len(connection.requests), 2)
+        self.assertEqual(len(FakeConnection.instances), 1)
+
+    def test_not_modified_reuses_last_rate_limit(self):
+        """A 304 response should keep the previously fetched limits"""
+        connection = self.queue(
+            _rate_limit_response(remaining=4000, headers={"ETag": '"abc"'}),
+            FakeResponse(status=304)
+        )
+        self.handler.get_rate_limit_info()
+        rate_limit = self.handler.get_rate_limit_info(force_refresh=True)
+
+        self.assertEqual(connection.requests[-1][2].get("If-None-Match"), '"abc"')
+        self.assertEqual(rate_limit.remaining, 4000)
+
+
+class TestRetry(HandlerTestCase):
+    """Rate-limited and failing requests are retried with backoff"""
+
+    def test_retries_after_secondary_rate_limit(self):
+        """A 429 with Retry-After is retried after sleeping that long"""
+        connection = self.queue(
+            FakeResponse(status=429, headers={"Retry-After": "3"}),
+            FakeResponse(body=b'{"ok": true}')
+        )
+        with mock.patch.object(api_limit_handler.time, "sleep") as sleep, \
+                mock.patch("builtins.print"):
+            data = self.handler.request("https://api.github.com/repos/o/r")
+
+        self.assertEqual(data, {"ok": True})
+        self.assertEqual(len(connection.requests), 2)
+        sleep.assert_called_once_with(3.0)
+
+    def test_gives_up_after_max_attempts(self):
+        """Persistent 5xx responses raise after the last attempt"""
+        attempts = api_limit_handler.MAX_RETRY_ATTEMPTS
+        self.queue(*[FakeResponse(status=502) for _ in range(attempts)])
+        with mock.patch.object(api_limit_handler.time, "sleep") as sleep, \
+                mock.patch("builtins.print"):
+            with self.assertRaises(api_limit_handler.urllib.error.HTTPError):
+                self.handler.request("https://api.github.com/repos/o/r")
+
+        delays = [c.args[0] for c in sleep.call_args_list]
+        self.assertEqual(len(delays), attempts - 1)
+        for i, delay in enumerate(delays):
+            self.assertGreaterEqual(delay, 2 ** i)
+            self.assertLessEqual(delay, 2 ** i + api_limit_handler.RETRY_JITTER)
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Token bucket admission control"""
+
+    def test_acquire_within_budget(self):
+        bucket = api_limit_handler.TokenBucket(capacity=10, refill_per_sec=1.0)
+        self.assertEqual(bucket.acquire(4), 0.0)
+        self.assertAlmostEqual(bucket.tokens, 6, places=2)
+
+    def test_acquire_over_budget_returns_wait(self):
+        bucket = api_limit_handler.TokenBucket(capacity=10, refill_per_sec=2.0, tokens=1)
+        self.assertAlmostEqual(bucket.acquire(5), 2.0, places=2)
+        self.assertAlmostEqual(bucket.tokens, 1, places=2)
+
+    def test_penalize_forces_backoff(self):
+        bucket = api_limit_handler.TokenBucket(capacity=10, refill_per_sec=1.0)
+        bucket.penalize()
+        self.assertGreater(bucket.acquire(1), 1.0)
+
+
+class TestHeaderTracking(HandlerTestCase):
+    """Regular API responses should keep rate limit state current"""
+
+    def test_request_updates_rate_limit_from_headers(self):
+        """request() should record X-RateLimit-* headers without polling"""
+        connection = self.queue(FakeResponse(body=b'{"ok": true}', headers={
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": "4321",
+            "X-RateLimit-Reset": "2000000000",
+            "X-RateLimit-Used": "679",
+        }))
+        data = self.handler.request("https://api.github.com/repos/o/r")
+        self.assertTrue(self.handler.check_rate_limit_before_request(10))
+
+        self.assertEqual(data, {"ok": True})
+        self.assertEqual(connection.requests, [
+            ("GET", "/repos/o/r", connection.requests[0][2])
+        ])
+        self.assertEqual(self.handler.last_rate_limit.remaining, 4321)
+
+    def test_later_headers_clamp_admission_bucket(self):
+        """Quota spent outside this handler should shrink the admission bucket"""
+        def headers(remaining):
+            message = email.message.Message()
+            for name, value in {
+                "X-RateLimit-Limit": "5000",
+                "X-RateLimit-Remaining": str(remaining),
+                "X-RateLimit-Reset": "2000000000",
+                "X-RateLimit-Used": str(5000 - remaining),
+            }.items():
+                message[name] = value
+            return message
+
+        self.handler.update_from_headers(headers(4321))
+        self.assertTrue(self.handler.check_rate_limit_before_request(10))
+        self.assertGreater(self.handler._bucket.tokens, 3000)
+
+        self.handler.update_from_headers(headers(600))
+        self.assertLessEqual(self.handler._bucket.tokens, 600 - 500 + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Tests for the GitHub Actions failure analyzer
+"""
+
+import importlib.util
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+spec = importlib.util.spec_from_file_location(
+    "failure_analyzer", project_root / "failure-analyzer.py"
+)
+failure_analyzer = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(failure_analyzer)
+
+SAMPLE_LOGS = {
+    "missing_package_json": "npm ERR! code ENOENT\nnpm ERR! enoent open '/app/package.json'",
+    "npm_package_not_found": "npm ERR! code E404\nnpm ERR! 404 Not Found - GET https://registry.npmjs.org/nope",
+    "npm_peer_dependency": "npm ERR! Could not resolve peer dep conflict ERESOLVE",
+    "python_missing_module": "ERROR: while importing: No module named 'requests'",
+    "python_syntax_error": "  File \"app.py\", line 3\nIndentationError: unexpected indent",
+    "python_import_error": "ImportError: cannot import name 'thing' from 'pkg'",
+    "test_failure": "FAILED tests/test_app.py::test_login - AssertionError",
+    "rust_compile_error": "error: mismatched types\n  --> src/main.rs:4:5",
+    "go_module_error": "go: example.com/mod@v1.2.3: reading: 404 Not Found",
+    "docker_error": "docker: Error response from daemon: pull access denied.",
+    "github_api_error": "ERROR: The request is invalid: missing scope",
+    "cache_failure": "Warning: Failed to restore cache entry",
+}
+
+
+class TestAnalyzeFailurePatterns(unittest.TestCase):
+    """Classification of log excerpts against FAILURE_PATTERNS"""
+
+    def setUp(self):
+        self.analyzer = failure_analyzer.GitHubActionsFailureAnalyzer()
+
+    def test_sample_logs_are_classified(self):
+        for error_type, logs in SAMPLE_LOGS.items():
+            with self.subTest(error_type=error_type):
+                analysis = self.analyzer.analyze_failure_patterns(logs)
+                self.assertEqual(analysis["error_type"], error_type)
+
+    def test_classification_without_automaton(self):
+        with mock.patch.object(failure_analyzer, "_LITERAL_AUTOMATON", None):
+            for error_type, logs in SAMPLE_LOGS.items():
+                with self.subTest(error_type=error_type):
+                    analysis = self.analyzer.analyze_failure_patterns(logs)
+                    self.assertEqual(analysis["error_type"], error_type)
+
+    def test_earlier_pattern_wins(self):
+        logs = SAMPLE_LOGS["cache_failure"] + "\n" + SAMPLE_LOGS["python_missing_module"]
+        analysis = self.analyzer.analyze_failure_patterns(logs)
+        self.assertEqual(analysis["error_type"], "python_missing_module")
+        self.assertEqual(analysis["error_details"], "requests")
+
+    def test_error_details_follow_pattern_groups(self):
+        details = {
+            error_type: self.analyzer.analyze_failure_patterns(SAMPLE_LOGS[error_type])["error_details"]
+            for error_type in ("docker_error", "github_api_error", "rust_compile_error")
+        }
+        self.assertEqual(details["docker_error"], "docker: Error response from daemon:")
+        self.assertEqual(details["github_api_error"], "missing scope")
+        self.assertEqual(details["rust_compile_error"], ("mismatched types", "src/main.rs", "4", "5"))
+
+    def test_unknown_logs(self):
+        analysis = self.analyzer.analyze_failure_patterns("All good\nDone")
+        self.assertEqual(analysis["error_type"], "unknown")
+        self.assertEqual(analysis["suggested_fixes"], [])
+
+    def test_results_do_not_share_pattern_lists(self):
+        analysis = self.analyzer.analyze_failure_patterns(SAMPLE_LOGS["cache_failure"])
+        analysis["suggested_fixes"].append("extra")
+        again = self.analyzer.analyze_failure_patterns(SAMPLE_LOGS["cache_failure"])
+        self.assertNotIn("extra", again["suggested_fixes"])
+
+    def test_every_pattern_has_literals(self):
+        for pattern_info in failure_analyzer.FAILURE_PATTERNS:
+            with self.subTest(error_type=pattern_info["error_type"]):
+                self.assertTrue(pattern_info["literals"])
+                for literal in pattern_info["literals"]:
+                    self.assertEqual(literal, literal.lower())
+
+
+class TestSplitLogsByJob(unittest.TestCase):
+    """Slicing of `gh run view --log-failed` output per job"""
+
+    def test_lines_grouped_by_job(self):
+        logs = (
+            "test\tRun tests\tNo module named 'requests'\n"
+            "lint\tflake8\tSyntaxError: invalid syntax\n"
+            "test\tRun tests\tProcess completed with exit code 1\n"
+        )
+        job_logs = failure_analyzer._split_logs_by_job(logs.splitlines(keepends=True))
+        self.assertEqual(sorted(job_logs), ["lint", "test"])
+        self.assertEqual(
+            job_logs["test"],
+            "test\tRun tests\tNo module named 'requests'\n"
+            "test\tRun tests\tProcess completed with exit code 1",
+        )
+
+    def test_lines_without_job_prefix_are_dropped(self):
+        self.assertEqual(failure_analyzer._split_logs_by_job(["plain line\n"]), {})
+
+
+class TestCreatedSince(unittest.TestCase):
+    """Cutoff checks on GitHub createdAt timestamps"""
+
+    CUTOFF = "2024-03-10T12:00:00Z"
+
+    def test_github_timestamps_compare_as_strings(self):
+        self.assertTrue(failure_analyzer._created_since("2024-03-10T12:00:00Z", self.CUTOFF))
+        self.assertTrue(failure_analyzer._created_since("2024-11-01T00:00:00Z", self.CUTOFF))
+        self.assertFalse(failure_analyzer._created_since("2024-03-10T11:59:59Z", self.CUTOFF))
+
+    def test_other_iso_layouts_are_parsed(self):
+        self.assertTrue(failure_analyzer._created_since("2024-03-10T13:30:00+01:00", self.CUTOFF))
+        self.assertFalse(failure_analyzer._created_since("2024-03-10T12:30:00+01:00", self.CUTOFF))
+        self.assertTrue(failure_analyzer._created_since("2024-03-10T12:00:00.500Z", self.CUTOFF))
+
+
+class TestGenerateFixSuggestions(unittest.TestCase):
+    """Markdown report for one analyzed run"""
+
+    def test_report_layout(self):
+        analyzer = failure_analyzer.GitHubActionsFailureAnalyzer()
+        run_analysis = {
+            "workflow_name": "CI",
+            "run_id": 7,
+            "failed_jobs": ["cache", "other"],
+            "job_analyses": {
+                "cache": analyzer.analyze_failure_patterns(SAMPLE_LOGS["cache_failure"]),
+                "other": analyzer.analyze_failure_patterns("nothing to see"),
+            },
+        }
+        self.assertEqual(
+            analyzer.generate_fix_suggestions(run_analysis),
+            "## 🔍 Failure Analysis: CI\n"
+            "**Run ID:** 7\n"
+            "**Failed Jobs:** cache, other\n"
+            "\n"
+            "### 🔨 cache\n"
+            "**Error Type:** cache_failure\n"
+            "**Issue:** Cache restore failed\n"
+            "**Confidence:** 60%\n"
+            "\n"
+            "**Recommended Fixes:**\n"
+            "- Update cache key patterns\n"
+            "- Clear old cache if corrupted\n"
+            "- Add fallback cache keys\n"
+            "\n"
+            "**Workflow Changes:**\n"
+            "- Update cache action with better key patterns\n"
+            "- Add restore-keys for cache fallbacks\n",
+        )
+
+
+class FakeProcess:
+    """Minimal stand-in for a subprocess.Popen streaming stdout"""
+
+    def __init__(self, lines, returncode=0):
+        self.stdout = iter(lines)
+        self.returncode = returncode
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class TestRunLogCache(unittest.TestCase):
+    """On-disk cache of failed-step logs"""
+
+    LINES = ["test\tRun tests\tNo module named 'requests'\n", "test\tRun tests\tdone\n"]
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        patcher = mock.patch.object(failure_analyzer, "LOG_CACHE_DIR", Path(tmp_dir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.analyzer = failure_analyzer.GitHubActionsFailureAnalyzer()
+
+    def test_second_read_served_from_cache(self):
+        with mock.patch.object(failure_analyzer.subprocess, "Popen",
+                               return_value=FakeProcess(self.LINES)) as popen:
+            self.assertEqual(list(self.analyzer.iter_run_log_lines("42", 1)), self.LINES)
+            self.assertEqual(list(self.analyzer.iter_run_log_lines("42", 1)), self.LINES)
+        self.assertEqual(popen.call_count, 1)
+
+    def test_failed_fetch_is_not_cached(self):
+        with mock.patch.object(failure_analyzer.subprocess, "Popen",
+                               return_value=FakeProcess([], returncode=1)):
+            self.assertEqual(self.analyzer.get_run_logs("42", 1), "")
+        self.assertEqual(list(failure_analyzer.LOG_CACHE_DIR.iterdir()), [])
+
+    def test_unknown_attempt_is_not_cached(self):
+        with mock.patch.object(failure_analyzer.subprocess, "Popen",
+                               return_value=FakeProcess(self.LINES)):
+            self.assertEqual(self.analyzer.get_run_logs("42"), "".join(self.LINES))
+        self.assertEqual(list(failure_analyzer.LOG_CACHE_DIR.iterdir()), [])
+
+    def test_invalid_utf8_is_replaced(self):
+        with mock.patch.object(failure_analyzer.subprocess, "Popen",
+                               return_value=FakeProcess([])) as popen:
+            list(self.analyzer.iter_run_log_lines("42"))
+        kwargs = popen.call_args.kwargs
+        self.assertEqual((kwargs["encoding"], kwargs["errors"]), ("utf-8", "replace"))
+
+    def test_unreadable_log_degrades_to_empty(self):
+        run = {"databaseId": 42, "workflowName": "CI", "url": "u", "createdAt": "c", "attempt": 1}
+        jobs = [{"name": "test", "conclusion": "failure"}]
+        with mock.patch.object(self.analyzer, "iter_run_log_lines",
+                               side_effect=UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid")):
+            run_analysis = self.analyzer._analyze_one_run(run, jobs)
+        self.assertEqual(run_analysis["job_analyses"]["test"]["error_type"], "unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()